@@ -1,15 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from ..db import get_db, Base, engine
+from ..db import get_db
 from .. import models, schemas
 from ..deps import get_org_id
 from ..utils import validate_unit
 
 
-# Create tables on startup (simplifies PoC)
-Base.metadata.create_all(bind=engine)
-
-
+# Tables come from migrations (or app.db.init_db); nothing runs at import.
 router = APIRouter()
 
 
@@ -1,18 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict
 from datetime import date
+from dataclasses import asdict, fields
+import csv
+import io
+import json
+import os
+import time
+import uuid
 
-from app.db import get_db
+import orjson
+import redis
+
+from app.db import get_async_db, get_db, SessionLocal
+from app.deps import get_redis
+from app.storage import get_storage
 from app import models, schemas
+from app.utils.pagination import decode_cursor, encode_cursor
 from app.utils.units import convert_to_canonical
 from app.models import EmissionFactor
-from app.services.calc import run_calculation
+from app.services import emissions, export
+from app.services.ingest import INGEST_QUEUE, ingest_rows
+from app.services.jobs import CalcJobs
+from app.services.calc import (
+    LineItem,
+    RunningTotals,
+    iter_line_items,
+    run_calculation,
+    run_calculation_json,
+    summarize_emissions,
+)
+from app.services import rollup
+from app.services.factors import factor_index
+from app.services.portfolio import run_portfolio
+from app.services.scenarios import run_scenarios
+from app.services.timeseries import emissions_timeseries
+from app.services.result_cache import etag_for, etag_matches, result_cache, single_flight
+from app.services.versions import bump_orgs, data_version, factors_version
 
 api_router = APIRouter()
 
+_ACTIVITY_OUT_FIELDS = tuple(schemas.ActivityOut.model_fields)
+_ACTIVITY_OUT_COLUMNS = [getattr(models.Activity, f) for f in _ACTIVITY_OUT_FIELDS]
+
 @api_router.get("/activities", response_model=List[schemas.ActivityOut])
-def list_activities(
+async def list_activities(
     org_id: Optional[int] = Query(None),
     category: Optional[str] = Query(None),
     scope: Optional[str] = Query(None, pattern=r"^(1|2|3)$"),
@@ -20,22 +57,40 @@ def list_activities(
     period_end: Optional[date] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(models.Activity)
+    """Activities newest first. Page with `offset`, or with `cursor` (keyset,
+    constant cost at any depth); the next page's cursor is returned in the
+    X-Next-Cursor header when more rows may follow."""
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    q = select(*_ACTIVITY_OUT_COLUMNS)
     if org_id is not None:
-        q = q.filter(models.Activity.org_id == org_id)
+        q = q.where(models.Activity.org_id == org_id)
     if category:
-        q = q.filter(models.Activity.category == category)
+        q = q.where(models.Activity.category == category)
     if scope:
-        q = q.filter(models.Activity.scope == scope)
+        q = q.where(models.Activity.scope == scope)
     if period_start:
-        q = q.filter(models.Activity.period_end >= period_start)
+        q = q.where(models.Activity.period_end >= period_start)
     if period_end:
-        q = q.filter(models.Activity.period_start <= period_end)
+        q = q.where(models.Activity.period_start <= period_end)
 
-    rows = q.order_by(models.Activity.period_start.desc()).offset(offset).limit(limit).all()
-    return [schemas.ActivityOut.model_validate(r) for r in rows]
+    if cursor:
+        try:
+            after_start, after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.where(tuple_(models.Activity.period_start, models.Activity.id) < tuple_(after_start, after_id))
+
+    q = q.order_by(models.Activity.period_start.desc(), models.Activity.id.desc())
+    rows = (await db.execute(q.offset(offset).limit(limit))).all()
+    # rows are already ActivityOut-shaped; encode them directly instead of validating each one
+    response = Response(orjson.dumps([dict(zip(_ACTIVITY_OUT_FIELDS, r)) for r in rows]), media_type="application/json")
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].period_start, rows[-1].id)
+    return response
 
 @api_router.post("/activities", response_model=schemas.ActivityOut)
 def create_activity(payload: schemas.ActivityCreate, db: Session = Depends(get_db)):
@@ -58,45 +113,350 @@ def create_activity(payload: schemas.ActivityCreate, db: Session = Depends(get_d
         notes=(payload.notes + " | " if payload.notes else "") + (note or ""),
         data_quality=payload.data_quality,
     )
+    obj.factor_id, obj.co2e_kg = emissions.selection(db, obj.category, obj.unit, obj.quantity)
     db.add(obj)
+    rollup.add_activities(db, [{
+        "org_id": obj.org_id, "period_start": obj.period_start, "scope": obj.scope,
+        "category": obj.category, "unit": obj.unit, "quantity": obj.quantity,
+    }])
+    bump_orgs(db, [payload.org_id])
     db.commit()
     db.refresh(obj)
     return schemas.ActivityOut.model_validate(obj)
 
+def _parse_bulk_body(body: bytes, content_type: str) -> list:
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        rows = []
+        for n, line in enumerate(body.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                # keep the row slot so the client sees which line was bad
+                rows.append(ValueError(f"line {n}: invalid JSON ({e})"))
+        return rows
+    try:
+        rows = json.loads(body or b"[]")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of activities")
+    return rows
+
+@api_router.post("/activities/bulk", response_model=schemas.BulkIngestResult)
+async def bulk_create_activities(request: Request, db: Session = Depends(get_db)):
+    """Create many activities in one transaction from a JSON array or NDJSON body.
+
+    Invalid rows are skipped and reported by index; valid rows are still inserted.
+    """
+    rows = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    report = await run_in_threadpool(ingest_rows, db, rows)
+    return schemas.BulkIngestResult(
+        received=report.received,
+        inserted=report.inserted,
+        failed=report.failed,
+        errors=report.errors,
+    )
+
+@api_router.post("/sources/upload", response_model=schemas.SourceOut)
+def upload_source(
+    org_id: int = Form(..., ge=1),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    r: redis.Redis = Depends(get_redis),
+):
+    """Store an activity CSV and queue it for the worker; parsing happens there."""
+    filename = file.filename or "upload.csv"
+    # the client's name is kept on the Source; only its last segment goes into the key
+    basename = os.path.basename(filename.replace("\\", "/"))
+    key = f"sources/{org_id}/{uuid.uuid4().hex}-{basename}"
+    uri = get_storage().save(key, file.file)
+    src = models.Source(org_id=org_id, type="csv", filename=filename, storage_uri=uri, status="uploaded")
+    db.add(src)
+    db.commit()
+    db.refresh(src)
+    r.rpush(INGEST_QUEUE, src.id)
+    return schemas.SourceOut.model_validate(src)
+
+@api_router.get("/sources/{source_id}", response_model=schemas.SourceOut)
+def get_source(source_id: int, db: Session = Depends(get_db)):
+    src = db.get(models.Source, source_id)
+    if src is None:
+        raise HTTPException(status_code=404, detail="Source not found")
+    return schemas.SourceOut.model_validate(src)
+
+_FACTOR_FIELDS = ("id", "dataset", "region", "category", "input_unit", "factor_value", "year", "version")
+
+def _factor_rows_stmt(category, region, dataset):
+    q = select(*(getattr(EmissionFactor, f) for f in _FACTOR_FIELDS))
+    if category: q = q.where(EmissionFactor.category == category)
+    if region: q = q.where(EmissionFactor.region == region)
+    if dataset: q = q.where(EmissionFactor.dataset == dataset)
+    return q.order_by(EmissionFactor.category, EmissionFactor.region)
+
+def _encode_rows(fields, rows) -> bytes:
+    return orjson.dumps([dict(zip(fields, r)) for r in rows])
+
+def _with_session(fn, *args, **kwargs):
+    """Run sync ORM code on its own session. Call it through run_in_threadpool,
+    so calculation and encoding never block the event loop.
+
+    The result is cached under a data version read before this runs, so the
+    factor index is first brought up to the committed factors: factors changed
+    by another process would otherwise only show after the index TTL.
+    """
+    db = SessionLocal()
+    try:
+        factor_index.ensure_current(db)
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+async def _versioned(request: Request, etag: str, compute) -> Response:
+    """Answer from the ETag or the result cache before calling `compute`.
+
+    `etag` must already carry the data version, so a match on either means
+    nothing the response depends on has been written since. Identical
+    requests that miss at the same time share one `compute`.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = result_cache.get(etag)
+    if body is None:
+        async def compute_and_cache() -> bytes:
+            body = await compute()
+            result_cache.put(etag, body)
+            return body
+
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        body = await single_flight.do(etag, compute_and_cache, endpoint=route)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @api_router.get("/factors")
-def list_factors(
+async def list_factors(
+    request: Request,
     category: Optional[str] = Query(None),
     region: Optional[str] = Query(None),
     dataset: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(EmissionFactor)
-    if category: q = q.filter(EmissionFactor.category == category)
-    if region: q = q.filter(EmissionFactor.region == region)
-    if dataset: q = q.filter(EmissionFactor.dataset == dataset)
-    return [  # plain dicts OK here
-        {
-            "id": f.id,
-            "dataset": f.dataset,
-            "region": f.region,
-            "category": f.category,
-            "input_unit": f.input_unit,
-            "factor_value": f.factor_value,
-            "year": f.year,
-            "version": f.version,
-        }
-        for f in q.order_by(EmissionFactor.category, EmissionFactor.region).all()
-    ]
+    version = await db.run_sync(factors_version)
+    etag = etag_for("factors", category, region, dataset, version)
+
+    async def compute() -> bytes:
+        rows = (await db.execute(_factor_rows_stmt(category, region, dataset))).all()
+        return await run_in_threadpool(_encode_rows, _FACTOR_FIELDS, rows)
+
+    return await _versioned(request, etag, compute)
+
+@api_router.get("/factors/cache")
+def factor_cache_stats():
+    return {**factor_index.stats(), "responses": {**result_cache.stats(), **single_flight.stats()}}
+
 @api_router.get("/calculate/run", response_model=schemas.CalculationResult)
-def calculate_run(
+async def calculate_run(
+    request: Request,
+    org_id: int = Query(..., ge=1),
+    period_start: date = Query(...),
+    period_end: date = Query(...),
+    region: Optional[str] = Query("US"),
+    engine: Optional[str] = Query(None, pattern="^(python|numpy|stored)$"),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
+    shape: str = Query("rows", pattern="^(rows|columns)$", description="columns: items as one array per field"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if period_start > period_end:
+        raise HTTPException(status_code=400, detail="Invalid period range")
+
+    if format != "json":
+        stream = _stream_ndjson if format == "ndjson" else _stream_csv
+        return StreamingResponse(
+            stream(org_id, period_start, period_end, region),
+            media_type="application/x-ndjson" if format == "ndjson" else "text/csv",
+        )
+
+    version = await db.run_sync(data_version, org_id)
+    etag = etag_for("calculate", org_id, period_start, period_end, region, shape, version)
+
+    async def compute() -> bytes:
+        # the calculation is CPU-bound sync ORM code: keep it off the event loop
+        return await run_in_threadpool(
+            _with_session,
+            run_calculation_json,
+            org_id=org_id,
+            period_start=period_start,
+            period_end=period_end,
+            region=region,
+            engine=engine,
+            shape=shape,
+        )
+
+    return await _versioned(request, etag, compute)
+
+@api_router.post("/calculate/jobs", response_model=schemas.CalcJob)
+def submit_calculation_job(
     org_id: int = Query(..., ge=1),
     period_start: date = Query(...),
     period_end: date = Query(...),
     region: Optional[str] = Query("US"),
     db: Session = Depends(get_db),
+    r: redis.Redis = Depends(get_redis),
 ):
+    """Queue a calculation for the worker; poll GET /calculate/jobs/{job_id} for the result."""
     if period_start > period_end:
         raise HTTPException(status_code=400, detail="Invalid period range")
+    return CalcJobs(r).submit(db, org_id, period_start, period_end, region)
+
+@api_router.get("/calculate/jobs/{job_id}", response_model=schemas.CalcJob)
+def get_calculation_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30, description="long-poll up to this many seconds"),
+    r: redis.Redis = Depends(get_redis),
+):
+    # sync on purpose: the redis client blocks, so the poll runs in the threadpool
+    jobs = CalcJobs(r)
+    deadline = time.monotonic() + wait
+    while True:
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job["status"] not in ("queued", "running") or time.monotonic() >= deadline:
+            return job
+        time.sleep(0.25)
+
+@api_router.post("/calculate/scenarios", response_model=schemas.ScenarioResult)
+def calculate_scenarios(payload: schemas.ScenarioRequest, db: Session = Depends(get_db)):
+    """Totals for one org under many factor choices (dataset, region, year, overrides)."""
+    if payload.period_start > payload.period_end:
+        raise HTTPException(status_code=400, detail="Invalid period range")
+    return run_scenarios(
+        db, payload.org_id, payload.period_start, payload.period_end, payload.scenarios
+    )
+
+@api_router.post("/calculate/portfolio", response_model=schemas.PortfolioResult)
+def calculate_portfolio(payload: schemas.PortfolioRequest):
+    """Per-org totals plus a portfolio rollup, computed across a process pool."""
+    if payload.period_start > payload.period_end:
+        raise HTTPException(status_code=400, detail="Invalid period range")
+    return run_portfolio(
+        payload.org_ids,
+        payload.period_start,
+        payload.period_end,
+        region=payload.region,
+        workers=payload.workers,
+    )
+
+def _streamed_items(org_id: int, period_start: date, period_end: date, region: Optional[str], totals: RunningTotals) -> Iterator[LineItem]:
+    # the request's Depends(get_db) session is closed before a streaming body
+    # is sent, so the stream owns its session
+    db = SessionLocal()
+    try:
+        for li in iter_line_items(db, org_id, period_start, period_end, region=region):
+            totals.add(li)
+            yield li
+    finally:
+        db.close()
+
+def _stream_ndjson(org_id: int, period_start: date, period_end: date, region: Optional[str]) -> Iterator[str]:
+    totals = RunningTotals()
+    for li in _streamed_items(org_id, period_start, period_end, region, totals):
+        yield json.dumps({"type": "item", **asdict(li)}) + "\n"
+    yield json.dumps({
+        "type": "summary",
+        "org_id": org_id,
+        "period_start": period_start.isoformat(),
+        "period_end": period_end.isoformat(),
+        "total_kg": totals.total_kg,
+        "by_scope": totals.by_scope,
+        "by_category": totals.by_category,
+    }) + "\n"
+
+def _stream_csv(org_id: int, period_start: date, period_end: date, region: Optional[str]) -> Iterator[str]:
+    columns = [f.name for f in fields(LineItem)]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def flush() -> str:
+        out = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return out
+
+    writer.writerow(columns)
+    totals = RunningTotals()
+    for n, li in enumerate(_streamed_items(org_id, period_start, period_end, region, totals), 1):
+        writer.writerow([getattr(li, c) for c in columns])
+        if n % 500 == 0:
+            yield flush()
+    # trailer: label in activity_id, kgCO2e in co2e_kg
+    blank = [""] * (len(columns) - 2)
+    writer.writerow(["total", *blank, totals.total_kg])
+    for k, v in totals.by_scope.items():
+        writer.writerow([f"scope:{k}", *blank, v])
+    for k, v in totals.by_category.items():
+        writer.writerow([f"category:{k}", *blank, v])
+    yield flush()
+
+def _stream_export(kind: str, fmt: str, filters: export.ExportFilters, region: Optional[str]) -> Iterator[bytes]:
+    db = SessionLocal()  # see _streamed_items
+    try:
+        yield from export.stream_export(export.iter_batches(db, kind, filters, region), kind, fmt)
+    finally:
+        db.close()
+
+@api_router.get("/export/{kind}")
+def export_download(
+    kind: str,
+    format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    org_id: Optional[List[int]] = Query(None),
+    period_start: Optional[date] = Query(None),
+    period_end: Optional[date] = Query(None),
+    scope: Optional[str] = Query(None, pattern=r"^(1|2|3)$"),
+    category: Optional[str] = Query(None),
+    region: Optional[str] = Query("US"),
+):
+    """Stream activities or line_items as Parquet or an Arrow IPC stream."""
+    if kind not in export.KINDS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    filters = export.ExportFilters(org_id, period_start, period_end, scope, category)
+    media_type, ext = export.FORMATS[format]
+    return StreamingResponse(
+        _stream_export(kind, format, filters, region),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{ext}"'},
+    )
+
+@api_router.post("/exports", response_model=schemas.ExportResult)
+def export_to_storage(payload: schemas.ExportRequest, db: Session = Depends(get_db)):
+    """Write an export to object storage (STORAGE_BACKEND) and return its URI."""
+    filters = export.ExportFilters(
+        payload.org_ids, payload.period_start, payload.period_end, payload.scope, payload.category
+    )
+    return export.save_export(db, payload.kind, payload.format, filters, region=payload.region)
+
+def _summary(db: Session, org_id, period_start, period_end, group_by, region, mode, engine) -> Dict[str, float]:
+    if mode == "rollup":
+        # whole months from the monthly rollup, raw activities only at the edges
+        return rollup.summarize_from_rollup(
+            db=db,
+            org_id=org_id,
+            period_start=period_start,
+            period_end=period_end,
+            group_by=group_by,
+            region=region,
+        )
+    if mode == "sql":
+        # aggregate in the database; latency doesn't grow with the activity count
+        return summarize_emissions(
+            db=db,
+            org_id=org_id,
+            period_start=period_start,
+            period_end=period_end,
+            group_by=group_by,
+            region=region,
+        )
 
     items, by_scope, by_category = run_calculation(
         db=db,
@@ -104,35 +464,67 @@ def calculate_run(
         period_start=period_start,
         period_end=period_end,
         region=region,
+        engine=engine,
+        include_items=False,
     )
-    total_kg = sum(i.co2e_kg for i in items)
-    return schemas.CalculationResult(
-        org_id=org_id,
-        period_start=period_start,
-        period_end=period_end,
-        total_kg=total_kg,
-        by_scope=by_scope,
-        by_category=by_category,
-        items=[schemas.EmissionLineItem(**i.__dict__) for i in items],
-    )
+    return by_scope if group_by == "scope" else by_category
 
 @api_router.get("/emissions/summary")
-def emissions_summary(
+async def emissions_summary(
+    request: Request,
     org_id: int = Query(..., ge=1),
     period_start: date = Query(...),
     period_end: date = Query(...),
     group_by: str = Query("scope", pattern="^(scope|category)$"),
     region: Optional[str] = Query("US"),
-    db: Session = Depends(get_db),
+    mode: str = Query("rollup", pattern="^(rollup|sql|python)$"),
+    engine: Optional[str] = Query(None, pattern="^(python|numpy|stored)$"),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Dict[str, float]:
     if period_start > period_end:
         raise HTTPException(status_code=400, detail="Invalid period range")
 
-    items, by_scope, by_category = run_calculation(
-        db=db,
+    version = await db.run_sync(data_version, org_id)
+    etag = etag_for("summary", org_id, period_start, period_end, group_by, region, mode, version)
+
+    async def compute() -> bytes:
+        summary = await run_in_threadpool(
+            _with_session, _summary, org_id, period_start, period_end, group_by, region, mode, engine
+        )
+        return json.dumps(summary).encode()
+
+    return await _versioned(request, etag, compute)
+
+@api_router.get("/emissions/timeseries", response_model=schemas.TimeseriesResult)
+def emissions_timeseries_endpoint(
+    org_id: int = Query(..., ge=1),
+    period_start: date = Query(...),
+    period_end: date = Query(...),
+    bucket: str = Query("month", pattern="^(day|week|month|quarter)$"),
+    group_by: str = Query("scope", pattern="^(scope|category)$"),
+    region: Optional[str] = Query("US"),
+    db: Session = Depends(get_db),
+):
+    """Whole trend in one call: each activity's co2e is prorated by day across buckets."""
+    if period_start > period_end:
+        raise HTTPException(status_code=400, detail="Invalid period range")
+    try:
+        series = emissions_timeseries(
+            db,
+            org_id=org_id,
+            period_start=period_start,
+            period_end=period_end,
+            bucket=bucket,
+            group_by=group_by,
+            region=region,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schemas.TimeseriesResult(
         org_id=org_id,
         period_start=period_start,
         period_end=period_end,
-        region=region,
+        bucket=bucket,
+        group_by=group_by,
+        series=series,
     )
-    return by_scope if group_by == "scope" else by_category
\ No newline at end of file
@@ -5,6 +5,12 @@ import os
 class Settings(BaseModel):
     project_name: str = os.getenv("PROJECT_NAME", "carbon-footprint-poc")
     database_url: str = os.getenv("DATABASE_URL", "")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    # the async engine is separate: per-process connections = both pools together
+    db_async_pool_size: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "5"))
+    db_async_max_overflow: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "5"))
+    auto_create_schema: bool = os.getenv("AUTO_CREATE_SCHEMA", "0") == "1"
     secret_key: str = os.getenv("SECRET_KEY", "changeme")
     cors_origins: str = os.getenv("BACKEND_CORS_ORIGINS", "http://localhost:3000")
     minio_endpoint: str = os.getenv("MINIO_ENDPOINT", "http://minio:9000")
@@ -12,6 +18,24 @@ class Settings(BaseModel):
     minio_access_key: str = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
     minio_secret_key: str = os.getenv("MINIO_SECRET_KEY", "minioadmin")
     redis_url: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "s3")  # s3|local
+    local_storage_dir: str = os.getenv("LOCAL_STORAGE_DIR", "/tmp/carbon-storage")
+    ingest_chunk_size: int = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+    worker_concurrency: int = int(os.getenv("WORKER_CONCURRENCY", "2"))
+    calc_result_ttl: int = int(os.getenv("CALC_RESULT_TTL", "86400"))
+    # seconds before the in-memory factor index re-reads the table (0 = only on invalidation)
+    factor_index_ttl: float = float(os.getenv("FACTOR_INDEX_TTL", "300"))
+    response_cache_size: int = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+    # bodies are whole calculation results, so memory is bounded in bytes too
+    response_cache_bytes: int = int(os.getenv("RESPONSE_CACHE_BYTES", str(256 * 1024 * 1024)))
+    response_cache_max_entry_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(16 * 1024 * 1024)))
+    query_count_header: bool = os.getenv("QUERY_COUNT_HEADER", "0") == "1"
+    default_region: str = os.getenv("DEFAULT_REGION", "US")
+    # read per-activity co2e_kg for default-region calculations instead of recomputing
+    stored_emissions: bool = os.getenv("STORED_EMISSIONS", "1") == "1"
+    calc_engine: str = os.getenv("CALC_ENGINE", "python")  # python|numpy
+    portfolio_workers: int = int(os.getenv("PORTFOLIO_WORKERS", "0"))  # 0 = CPU count
 
 
 settings = Settings()
\ No newline at end of file
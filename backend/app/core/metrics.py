@@ -0,0 +1,106 @@
+# backend/app/core/metrics.py
+"""In-process Prometheus metrics: request latency, SQL per request, calc phases.
+
+Everything lives in the process's default registry and is scraped from
+`/metrics`; nothing is pushed anywhere. SQL statements are counted by engine
+event hooks into a per-request `QueryStats` carried in a contextvar, so code
+running outside a request (worker, scripts) is simply not attributed.
+"""
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+REQUEST_QUERY_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per request",
+    ["route"],
+)
+CALC_PHASE_SECONDS = Histogram(
+    "calc_phase_duration_seconds",
+    "Time per calculation phase",
+    ["engine", "phase"],
+)
+CALC_COALESCED = Counter(
+    "calc_coalesced_total",
+    "Requests answered by another request's in-flight computation",
+    ["endpoint"],
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Attribute SQL executed in this context (and tasks/threads it spawns)."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - started
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+@contextmanager
+def span(phase: str, engine: str = "python") -> Iterator[None]:
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        CALC_PHASE_SECONDS.labels(engine, phase).observe(time.perf_counter() - t)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, queries: QueryStats) -> None:
+    REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+    REQUEST_QUERIES.labels(route).observe(queries.count)
+    REQUEST_QUERY_SECONDS.labels(route).observe(queries.seconds)
+
+
+def render() -> bytes:
+    return generate_latest()
+
@@ -1,23 +1,110 @@
 """Database setup: SQLAlchemy engine/session + base declarative.
 Ensures a single engine per process and provides a Session dependency.
+The engine is created on first use, so importing the app needs no database.
 """
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 import os
+import threading
 
+from app.core.config import settings
 
-DATABASE_URL = os.getenv("DATABASE_URL", "")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL not set")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+_async_session_factory = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def _database_url() -> str:
+    url = os.getenv("DATABASE_URL", "")
+    if not url:
+        raise RuntimeError("DATABASE_URL not set")
+    return url
+
+
+def _pool_kwargs(url, pool_size: int, max_overflow: int) -> dict:
+    if url.get_backend_name() == "sqlite":
+        return {}
+    return {"pool_size": pool_size, "max_overflow": max_overflow}
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = make_url(_database_url())
+                _engine = create_engine(
+                    url, pool_pre_ping=True, **_pool_kwargs(url, settings.db_pool_size, settings.db_max_overflow)
+                )
+    return _engine
+
+
+def _async_url(url):
+    """Same database through an async driver (psycopg 3 async, aiosqlite)."""
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+psycopg")
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                url = _async_url(make_url(_database_url()))
+                # its own budget: the async engine only serves the cheap lookups
+                _async_engine = create_async_engine(
+                    url,
+                    pool_pre_ping=True,
+                    **_pool_kwargs(url, settings.db_async_pool_size, settings.db_async_max_overflow),
+                )
+    return _async_engine
+
+
+def SessionLocal(**kwargs) -> Session:
+    return _session_factory(bind=get_engine(), **kwargs)
+
+
+def AsyncSessionLocal(**kwargs) -> AsyncSession:
+    return _async_session_factory(bind=get_async_engine(), **kwargs)
+
+
+def __getattr__(name: str):
+    # `from app.db import engine` still works, but only connects when used
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class Base(DeclarativeBase):
     pass
 
 
+def init_db() -> None:
+    """Create missing tables. Migrations are the normal path; this is for
+    local/dev setups and benchmarks (see AUTO_CREATE_SCHEMA)."""
+    from app import models  # noqa: F401  (register tables on Base.metadata)
+
+    Base.metadata.create_all(bind=get_engine())
+
+
+def dialect_insert(db):
+    """Dialect-specific INSERT (supports on_conflict_do_update) for the session's database."""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -25,3 +112,14 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines() -> None:
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
@@ -1,4 +1,8 @@
+from functools import lru_cache
 from fastapi import Header, HTTPException
+import redis
+
+from app.core.config import settings
 
 
 async def get_org_id(x_org_id: int | None = Header(default=None)) -> int:
@@ -7,4 +11,10 @@ async def get_org_id(x_org_id: int | None = Header(default=None)) -> int:
     """
     if x_org_id is None:
         raise HTTPException(status_code=400, detail="X-Org-Id header required")
-    return x_org_id
\ No newline at end of file
+    return x_org_id
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """Shared Redis client; override this dependency in tests (e.g. fakeredis)."""
+    return redis.from_url(settings.redis_url)
@@ -1,9 +1,24 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import time
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import api_router
-from app.db import Base, engine  
+from app.core import metrics
+from app.core.config import settings
+from app.db import dispose_engines, init_db
+from app.services.portfolio import shutdown_pool
 
-app = FastAPI(title="Carbon Footprint API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # schema is managed by Alembic; opt in to create_all for local/dev runs
+    if settings.auto_create_schema:
+        init_db()
+    yield
+    shutdown_pool(wait=False)
+    await dispose_engines()
+
+app = FastAPI(title="Carbon Footprint API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,10 +26,73 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Query-Count", "X-Query-Time-Ms"],
 )
 
+class InstrumentRequests:
+    """Latency, status and SQL per request, measured until the last body chunk.
+
+    Pure ASGI rather than `@app.middleware("http")`, whose `call_next` returns
+    before a streamed body is produced. X-Query-Count / X-Query-Time-Ms are
+    only added to bodies sent in one piece: a stream's headers leave before
+    its queries run, so the count is only in the metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers_wanted = settings.query_count_header or any(k == b"x-query-count" for k, _ in scope["headers"])
+        started = time.perf_counter()
+        status, start_message, observed = 500, None, False
+
+        with metrics.track_queries() as queries:
+            def observe():
+                nonlocal observed
+                if not observed:
+                    observed = True
+                    # label by route template, not raw path, to keep cardinality bounded
+                    route = getattr(scope.get("route"), "path", "unmatched")
+                    metrics.observe_request(scope["method"], route, status, time.perf_counter() - started, queries)
+
+            async def send_measured(message):
+                nonlocal status, start_message
+                if message["type"] == "http.response.start":
+                    # held back until the first body chunk shows whether it streams
+                    status, start_message = message["status"], message
+                    return
+                if message["type"] == "http.response.body":
+                    last = not message.get("more_body", False)
+                    if start_message is not None:
+                        start, start_message = start_message, None
+                        if last and headers_wanted:
+                            start = {**start, "headers": [
+                                *start.get("headers", []),
+                                (b"x-query-count", str(queries.count).encode()),
+                                (b"x-query-time-ms", f"{queries.seconds * 1000:.1f}".encode()),
+                            ]}
+                        await send(start)
+                    await send(message)
+                    if last:
+                        observe()
+                    return
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_measured)
+            finally:
+                observe()
+
+app.add_middleware(InstrumentRequests)
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
 app.include_router(api_router)
@@ -1,5 +1,5 @@
 from sqlalchemy.dialects.postgresql import ENUM as PGEnum
-from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from .db import Base
 
@@ -13,7 +13,11 @@ class Source(Base):
     type = Column(String, nullable=False)  # manual|csv|invoice
     filename = Column(String)
     storage_uri = Column(String)
-    status = Column(String, default="uploaded")
+    status = Column(String, default="uploaded")  # uploaded|processing|completed|failed
+    rows_processed = Column(Integer, default=0)
+    rows_inserted = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    error = Column(Text)
 
 class Activity(Base):
     __tablename__ = "activities"
@@ -28,6 +32,10 @@ class Activity(Base):
     source_id = Column(Integer, ForeignKey("sources.id"))
     notes = Column(Text)
     data_quality = Column(String, default="actual")  # actual|estimate|default
+    # factor selected for settings.default_region and the resulting kgCO2e,
+    # stamped at insert and kept current by app.services.emissions
+    factor_id = Column(Integer, ForeignKey("emission_factors.id", ondelete="SET NULL"), nullable=True)
+    co2e_kg = Column(Float, nullable=True)
 
     source = relationship("Source")
 
@@ -42,3 +50,53 @@ class EmissionFactor(Base):
     year = Column(Integer, nullable=True)           # reference year
     version = Column(String, nullable=True)         # dataset version tag
 
+# Access-path indexes (migration e7b3c5a90f12). INCLUDE columns are Postgres-only.
+# Period overlap (org_id = ? AND period_end >= ? AND period_start <= ?) and the
+# period_start DESC, id DESC listing order; covers the calculation columns.
+Index(
+    "ix_activities_org_period_start",
+    Activity.org_id, Activity.period_start.desc(), Activity.id.desc(),
+    postgresql_include=["period_end", "scope", "category", "unit", "quantity"],
+)
+# Overlap queries over recent ranges are selective on period_end instead.
+Index("ix_activities_org_period_end", Activity.org_id, Activity.period_end)
+# Factor-change recompute touches one (category, unit) selection at a time (migration 5e9a7c3b1d20).
+Index("ix_activities_category_unit", Activity.category, Activity.unit)
+# Factor selection: partition by (category, input_unit), newest year then highest id.
+# SQLite can't index NULLS LAST, so it is only created on Postgres.
+Index(
+    "ix_emission_factors_lookup",
+    EmissionFactor.category, EmissionFactor.input_unit,
+    EmissionFactor.year.desc().nullslast(), EmissionFactor.id.desc(),
+    postgresql_include=["region", "factor_value"],
+).ddl_if(dialect="postgresql")
+# One row per dataset release entry (migration 8c1d2e3f4a5b); importers upsert on it.
+# NULLS NOT DISTINCT (Postgres 15+) makes a NULL region/year a real key value.
+Index(
+    "uq_emission_factors_key",
+    EmissionFactor.dataset, EmissionFactor.region, EmissionFactor.category,
+    EmissionFactor.input_unit, EmissionFactor.year,
+    unique=True,
+    postgresql_nulls_not_distinct=True,
+)
+
+
+class EmissionRollup(Base):
+    """Activity quantities pre-summed per org x month (of period_start) x scope x
+    category x unit. kgCO2e is applied at read time from the selected factor,
+    so factor changes never require rewriting the rollup."""
+    __tablename__ = "emission_rollups"
+    org_id = Column(Integer, primary_key=True)
+    month = Column(Date, primary_key=True)          # first day of the month
+    scope = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    unit = Column(String, primary_key=True)
+    quantity = Column(Float, nullable=False, default=0.0)
+    activity_count = Column(Integer, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    """Change counters: one row per org ("org:<id>") plus one for "factors"."""
+    __tablename__ = "data_versions"
+    key = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
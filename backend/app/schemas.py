@@ -21,6 +21,15 @@ class ActivityOut(ActivityCreate):
     class Config:
         from_attributes = True
 
+class FactorIn(BaseModel):
+    dataset: str = Field(min_length=1)
+    region: Optional[str] = None
+    category: str = Field(min_length=1)
+    input_unit: str = Field(min_length=1)
+    factor_value: float
+    year: Optional[int] = None
+    version: Optional[str] = None
+
 class EmissionLineItem(BaseModel):
     activity_id: int
     category: str
@@ -42,4 +51,128 @@ class CalculationResult(BaseModel):
     total_kg: float
     by_scope: Dict[str, float]
     by_category: Dict[str, float]
-    items: List[EmissionLineItem]
\ No newline at end of file
+    items: List[EmissionLineItem]
+
+class BulkRowError(BaseModel):
+    index: int
+    errors: List[str]
+
+class BulkIngestResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
+
+class SourceOut(BaseModel):
+    id: int
+    org_id: Optional[int] = None
+    type: str
+    filename: Optional[str] = None
+    storage_uri: Optional[str] = None
+    status: Optional[str] = None
+    rows_processed: Optional[int] = None
+    rows_inserted: Optional[int] = None
+    rows_failed: Optional[int] = None
+    error: Optional[str] = None
+    class Config:
+        from_attributes = True
+
+class CalcJob(BaseModel):
+    job_id: str
+    status: str  # queued|running|done|failed|expired
+    result: Optional[CalculationResult] = None
+    error: Optional[str] = None
+
+class TimeseriesPoint(BaseModel):
+    start: date
+    end: date
+    total: float
+    values: Dict[str, float]
+
+class TimeseriesResult(BaseModel):
+    org_id: int
+    period_start: date
+    period_end: date
+    bucket: str
+    group_by: str
+    series: List[TimeseriesPoint]
+
+class PortfolioRequest(BaseModel):
+    org_ids: List[int] = Field(min_length=1, max_length=5000)
+    period_start: date
+    period_end: date
+    region: Optional[str] = "US"
+    # 1 = compute in the API process; otherwise the shared pool (PORTFOLIO_WORKERS)
+    workers: Optional[int] = Field(default=None, ge=1, le=64)
+
+class OrgTotals(BaseModel):
+    org_id: int
+    total_kg: float
+    by_scope: Dict[str, float]
+    by_category: Dict[str, float]
+
+class PortfolioResult(BaseModel):
+    period_start: date
+    period_end: date
+    region: Optional[str] = None
+    total_kg: float
+    by_scope: Dict[str, float]
+    by_category: Dict[str, float]
+    orgs: List[OrgTotals]
+
+
+class ExportRequest(BaseModel):
+    kind: str = Field("activities", pattern="^(activities|line_items)$")
+    format: str = Field("parquet", pattern="^(parquet|arrow)$")
+    org_ids: Optional[List[int]] = None
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+    scope: Optional[str] = Field(None, pattern=r"^(1|2|3)$")
+    category: Optional[str] = None
+    region: Optional[str] = "US"
+
+
+class ExportResult(BaseModel):
+    uri: str
+    kind: str
+    format: str
+    rows: int
+    bytes: int
+
+
+class FactorOverride(BaseModel):
+    category: str
+    unit: str
+    factor_value: float
+
+
+class Scenario(BaseModel):
+    name: str
+    dataset: Optional[str] = None
+    region: Optional[str] = "US"
+    year: Optional[int] = None
+    overrides: List[FactorOverride] = []
+
+
+class ScenarioRequest(BaseModel):
+    org_id: int = Field(ge=1)
+    period_start: date
+    period_end: date
+    scenarios: List[Scenario] = Field(min_length=1, max_length=200)
+
+
+class ScenarioTotals(BaseModel):
+    name: str
+    total_kg: float
+    by_scope: Dict[str, float]
+    by_category: Dict[str, float]
+    activities_mapped: int
+    activities_unmapped: int
+
+
+class ScenarioResult(BaseModel):
+    org_id: int
+    period_start: date
+    period_end: date
+    activities: int
+    scenarios: List[ScenarioTotals]
@@ -0,0 +1,122 @@
+# backend/app/scripts/check_query_plans.py
+"""Query-plan regression check for the hot queries.
+
+Builds the statements the API actually runs, EXPLAINs each on the configured
+Postgres database with sequential scans disabled, and exits non-zero unless
+every read of `activities` or `emission_factors` goes through one of the
+access-path indexes from migration e7b3c5a90f12 (`EXPECTED`). Naming the
+indexes matters: with seq scans priced out the planner will always find
+*some* index, e.g. a primary key, so "no Seq Scan" alone proves nothing.
+Run after migrations, e.g. in CI:
+
+    python -m app.scripts.check_query_plans [--verbose]
+"""
+import argparse
+import json
+import sys
+from datetime import date
+
+from sqlalchemy import select, text
+
+from app.db import get_engine
+from app.models import Activity
+from app.services.calc import _in_period, _ranked_factors, _stored_summary_stmt, _summary_stmt
+
+# relation -> indexes a hot query may read it through
+EXPECTED = {
+    "activities": {"ix_activities_org_period_start", "ix_activities_org_period_end"},
+    "emission_factors": {"ix_emission_factors_lookup"},
+}
+START, END = date(2024, 1, 1), date(2024, 12, 31)
+
+
+def _queries():
+    ranked = _ranked_factors(region="US", keys=[("electricity", "kWh"), ("diesel", "L")])
+    return {
+        # run_calculation / iter_line_items activity load
+        "calc_activities": select(
+            Activity.id, Activity.scope, Activity.category, Activity.unit, Activity.quantity
+        ).where(_in_period(1, START, END)),
+        # GET /activities
+        "list_activities": select(Activity)
+        .where(Activity.org_id == 1, Activity.period_end >= START, Activity.period_start <= END)
+        .order_by(Activity.period_start.desc(), Activity.id.desc())
+        .limit(100),
+        # calc._ranked_factors, the SQL twin of FactorIndex.pick
+        "ranked_factors": select(ranked).where(ranked.c.rn == 1),
+        # /emissions/summary (mode=sql)
+        "summary_by_scope": _summary_stmt(1, START, END, group_by="scope", region="US"),
+        # /emissions/summary (mode=sql, default region)
+        "summary_stored": _stored_summary_stmt(1, START, END, group_by="scope"),
+    }
+
+
+def _bitmap_indexes(node):
+    if node.get("Node Type") == "Bitmap Index Scan":
+        yield node["Index Name"]
+    for child in node.get("Plans", []):
+        yield from _bitmap_indexes(child)
+
+
+def _scans(node, found):
+    """(relation, node type, indexes) for every read of a watched relation."""
+    kind, relation = node.get("Node Type"), node.get("Relation Name")
+    if relation in EXPECTED:
+        if kind == "Bitmap Heap Scan":
+            found.append((relation, kind, tuple(_bitmap_indexes(node))))
+        elif kind in ("Seq Scan", "Index Scan", "Index Only Scan"):
+            found.append((relation, kind, (node["Index Name"],) if "Index Name" in node else ()))
+    for child in node.get("Plans", []):
+        _scans(child, found)
+    return found
+
+
+def problems(plan) -> list:
+    """Reads of watched relations that no expected index serves.
+
+    A bitmap scan counts if any of the indexes it combines is expected.
+    """
+    return [
+        f"{kind} on {relation}" + (f" via {', '.join(indexes)}" if indexes else "")
+        for relation, kind, indexes in _scans(plan, [])
+        if not EXPECTED[relation].intersection(indexes)
+    ]
+
+
+def explain(engine):
+    """{query name: JSON plan} for every hot query, with seq scans disabled."""
+    plans = {}
+    with engine.connect() as conn:
+        for name, stmt in _queries().items():
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            with conn.begin():
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+                plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            plans[name] = plan[0]["Plan"]
+    return plans
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Fail if hot queries don't use their access-path indexes.")
+    ap.add_argument("--verbose", action="store_true", help="print every plan")
+    args = ap.parse_args(argv)
+
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        print(f"query plan check needs Postgres, got {engine.dialect.name}", file=sys.stderr)
+        return 2
+
+    failures = 0
+    for name, plan in explain(engine).items():
+        found = problems(plan)
+        failures += bool(found)
+        print(f"{'FAIL' if found else 'ok':4} {name}" + (f"  {'; '.join(found)}" if found else ""))
+        if args.verbose or found:
+            print(json.dumps(plan, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
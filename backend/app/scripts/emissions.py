@@ -0,0 +1,45 @@
+# backend/app/scripts/emissions.py
+"""Maintain the per-activity factor_id / co2e_kg columns.
+
+    python -m app.scripts.emissions check [--org-id N] [--fix]   # exit 1 if any row is stale
+    python -m app.scripts.emissions recompute [--category C --unit U]
+"""
+import argparse
+import json
+import sys
+
+from app.db import SessionLocal
+from app.services import emissions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Check or recompute stored activity emissions.")
+    ap.add_argument("command", choices=["check", "recompute"])
+    ap.add_argument("--org-id", type=int, default=None, help="check: only this org")
+    ap.add_argument("--fix", action="store_true", help="check: recompute the stale selections")
+    ap.add_argument("--category", default=None, help="recompute: only this (category, unit)")
+    ap.add_argument("--unit", default=None)
+    args = ap.parse_args(argv)
+    if (args.category is None) != (args.unit is None):
+        ap.error("--category and --unit go together")
+
+    db = SessionLocal()
+    try:
+        if args.command == "recompute":
+            pairs = [(args.category, args.unit)] if args.category else None
+            print(f"{emissions.recompute(db, pairs)} activities updated.")
+            return 0
+        report = emissions.check(db, org_id=args.org_id)
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        if report["mismatched"] and args.fix:
+            updated = emissions.recompute(db, [tuple(p) for p in report["pairs"]])
+            print(f"{updated} activities updated.")
+            return 0
+        return 1 if report["mismatched"] else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
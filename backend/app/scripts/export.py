@@ -0,0 +1,54 @@
+# backend/app/scripts/export.py
+"""Bulk export of activities or calculated line items as Parquet / Arrow.
+
+    python -m app.scripts.export activities --out activities.parquet --org-ids 1,2 --start 2024-01-01
+    python -m app.scripts.export line_items --format arrow --out items.arrows --scope 2
+    python -m app.scripts.export line_items --to-storage          # upload via STORAGE_BACKEND
+"""
+import argparse
+import json
+import sys
+from datetime import date
+
+from app.db import SessionLocal
+from app.services import export
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Columnar export of activities or line items.")
+    ap.add_argument("kind", choices=export.KINDS)
+    ap.add_argument("--format", choices=sorted(export.FORMATS), default="parquet")
+    dest = ap.add_mutually_exclusive_group(required=True)
+    dest.add_argument("--out", help="local file to write")
+    dest.add_argument("--to-storage", action="store_true", help="upload to the configured object storage")
+    ap.add_argument("--org-ids", help="comma-separated org ids (default: all)")
+    ap.add_argument("--start", type=date.fromisoformat, default=None)
+    ap.add_argument("--end", type=date.fromisoformat, default=None)
+    ap.add_argument("--scope", choices=["1", "2", "3"], default=None)
+    ap.add_argument("--category", default=None)
+    ap.add_argument("--region", default="US", help="factor region for line_items")
+    ap.add_argument("--batch-size", type=int, default=export.BATCH_SIZE)
+    args = ap.parse_args(argv)
+
+    org_ids = [int(x) for x in args.org_ids.split(",") if x.strip()] if args.org_ids else None
+    filters = export.ExportFilters(org_ids, args.start, args.end, args.scope, args.category)
+    db = SessionLocal()
+    try:
+        if args.to_storage:
+            result = export.save_export(
+                db, args.kind, args.format, filters, region=args.region, batch_size=args.batch_size
+            )
+        else:
+            with open(args.out, "wb") as f:
+                batches = export.iter_batches(db, args.kind, filters, args.region, args.batch_size)
+                rows = export.write_export(batches, args.kind, args.format, f)
+                result = {"uri": args.out, "kind": args.kind, "format": args.format, "rows": rows, "bytes": f.tell()}
+    finally:
+        db.close()
+    json.dump(result, sys.stdout)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
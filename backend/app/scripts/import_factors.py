@@ -0,0 +1,56 @@
+# backend/app/scripts/import_factors.py
+"""Load an emission factor dataset release from a file.
+
+    python -m app.scripts.import_factors epa_2024.csv --dataset EPA --version EPA-2024
+    python -m app.scripts.import_factors defra.jsonl --batch-size 10000 --dry-run
+
+Columns / keys: dataset, region, category, input_unit, factor_value, year,
+version (dataset and version may come from the flags instead). Rows are
+upserted on (dataset, region, category, input_unit, year); the report gives
+inserted / updated / unchanged counts, the number of activities whose stored
+emissions were recomputed, and per-row errors.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from app.db import SessionLocal
+from app.services.factor_import import BATCH_SIZE, FORMATS, import_factor_rows, read_factor_rows
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Bulk upsert of emission factors from CSV / JSON.")
+    ap.add_argument("path")
+    ap.add_argument("--format", choices=FORMATS, default=None, help="default: from the file extension")
+    ap.add_argument("--dataset", default=None, help="force this dataset on every row")
+    ap.add_argument("--version", default=None, help="force this version tag on every row")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--dry-run", action="store_true", help="report what would change, then roll back")
+    args = ap.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower().replace("ndjson", "jsonl")
+    if fmt not in FORMATS:
+        ap.error(f"can't tell the format of {args.path}; pass --format")
+    overrides = {k: v for k, v in (("dataset", args.dataset), ("version", args.version)) if v is not None}
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            report = import_factor_rows(
+                db, read_factor_rows(f, fmt), batch_size=args.batch_size, overrides=overrides, dry_run=args.dry_run
+            )
+    finally:
+        db.close()
+    out = report.as_dict()
+    out["seconds"] = round(time.perf_counter() - started, 2)
+    out["dry_run"] = args.dry_run
+    json.dump(out, sys.stdout)
+    print()
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
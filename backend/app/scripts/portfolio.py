@@ -0,0 +1,48 @@
+# backend/app/scripts/portfolio.py
+"""Portfolio calculation from the command line.
+
+    python -m app.scripts.portfolio --org-ids 1,2,3 --start 2024-01-01 --end 2024-12-31 [--workers 8]
+    python -m app.scripts.portfolio --org-ids-file orgs.txt --start ... --end ... > report.json
+"""
+import argparse
+import json
+import sys
+from datetime import date
+
+from app.core.config import settings
+from app.services.portfolio import run_portfolio, shutdown_pool
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Per-org and portfolio emissions totals.")
+    ids = ap.add_mutually_exclusive_group(required=True)
+    ids.add_argument("--org-ids", help="comma-separated org ids")
+    ids.add_argument("--org-ids-file", help="file with one org id per line")
+    ap.add_argument("--start", type=date.fromisoformat, required=True)
+    ap.add_argument("--end", type=date.fromisoformat, required=True)
+    ap.add_argument("--region", default="US")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default PORTFOLIO_WORKERS or CPU count)")
+    ap.add_argument("--engine", choices=["python", "numpy"], default=None)
+    args = ap.parse_args(argv)
+
+    if args.org_ids:
+        org_ids = [int(x) for x in args.org_ids.split(",") if x.strip()]
+    else:
+        with open(args.org_ids_file) as f:
+            org_ids = [int(line) for line in f if line.strip()]
+    if args.start > args.end:
+        ap.error("--start must not be after --end")
+
+    if args.workers:
+        settings.portfolio_workers = args.workers
+    try:
+        result = run_portfolio(org_ids, args.start, args.end, region=args.region, workers=args.workers, engine=args.engine)
+    finally:
+        shutdown_pool()
+    json.dump(result, sys.stdout, default=str, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
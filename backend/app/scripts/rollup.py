@@ -0,0 +1,36 @@
+# backend/app/scripts/rollup.py
+"""Maintain the monthly emissions rollup.
+
+    python -m app.scripts.rollup check [--org-id N]    # exit 1 if it disagrees with a full recompute
+    python -m app.scripts.rollup rebuild [--org-id N]  # replace it with a full recompute
+"""
+import argparse
+import sys
+
+from app.db import SessionLocal
+from app.services import rollup
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Check or rebuild the monthly emissions rollup.")
+    ap.add_argument("command", choices=["check", "rebuild"])
+    ap.add_argument("--org-id", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rollup.rebuild(db, org_id=args.org_id)
+            print("Rollup rebuilt.")
+            return 0
+        problems = rollup.check(db, org_id=args.org_id)
+        for p in problems:
+            print(p)
+        print("Rollup in sync." if not problems else f"{len(problems)} rollup rows out of sync.")
+        return 1 if problems else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 # backend/app/scripts/seed_factors.py
-from sqlalchemy.orm import Session
-from app.db import SessionLocal, engine
-from app.models import EmissionFactor, Base
+from app.db import SessionLocal, get_engine
+from app.models import Activity, Base, DataVersion, EmissionFactor, Source
+from app.services.factor_import import import_factor_rows
 
 SEED = [
     # dataset, region, category, input_unit, factor_value (kgCO2e per unit), year, version
@@ -11,38 +11,22 @@ SEED = [
     ("EPA", "US", "natural_gas", "therm", 5.31, 2022, "EPA-2022"),
 ]
 
-def upsert_factor(db: Session, row):
-    dataset, region, category, unit, value, year, version = row
-    obj = (
-        db.query(EmissionFactor)
-        .filter(
-            EmissionFactor.dataset == dataset,
-            EmissionFactor.region == region,
-            EmissionFactor.category == category,
-            EmissionFactor.input_unit == unit,
-            EmissionFactor.year == year,
-        )
-        .one_or_none()
-    )
-    if obj:
-        obj.factor_value = value
-        obj.version = version
-    else:
-        obj = EmissionFactor(
-            dataset=dataset, region=region, category=category,
-            input_unit=unit, factor_value=value, year=year, version=version
-        )
-        db.add(obj)
+FIELDS = ("dataset", "region", "category", "input_unit", "factor_value", "year", "version")
 
 def main():
-    # ensure table exists (safe if using Alembic already)
-    Base.metadata.create_all(bind=engine, tables=[EmissionFactor.__table__])
+    # ensure tables exist (safe if using Alembic already); the import recomputes activities
+    Base.metadata.create_all(
+        bind=get_engine(),
+        tables=[EmissionFactor.__table__, DataVersion.__table__, Source.__table__, Activity.__table__],
+    )
     db = SessionLocal()
     try:
-        for row in SEED:
-            upsert_factor(db, row)
-        db.commit()
-        print(f"Seeded {len(SEED)} factors.")
+        report = import_factor_rows(db, (dict(zip(FIELDS, row)) for row in SEED))
+        print(
+            f"Seeded {len(SEED)} factors: {report.inserted} inserted, "
+            f"{report.updated} updated, {report.unchanged} unchanged; "
+            f"{report.recomputed} activities recomputed."
+        )
     finally:
         db.close()
 
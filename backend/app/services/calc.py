@@ -1,14 +1,19 @@
 # backend/app/services/calc.py
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Tuple
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple
+import orjson
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select, tuple_
+from app.core.config import settings
+from app.core.metrics import span
 from app.models import Activity, EmissionFactor
+from app.services.factors import factor_index
 from sqlalchemy import or_
 
 
-@dataclass
+@dataclass(slots=True)
 class LineItem:
     activity_id: int
     category: str
@@ -23,63 +28,255 @@ class LineItem:
     version: Optional[str]
     co2e_kg: float
 
-def _pick_factor(db, category: str, unit: str, region: Optional[str] = None):
-    q = db.query(EmissionFactor).filter(
-        EmissionFactor.category == category,
-        EmissionFactor.input_unit == unit,
+LINE_ITEM_FIELDS = tuple(f.name for f in fields(LineItem))
+_line_item_values = attrgetter(*LINE_ITEM_FIELDS)
+
+@dataclass
+class RunningTotals:
+    total_kg: float = 0.0
+    by_scope: Dict[str, float] = field(default_factory=lambda: {"1": 0.0, "2": 0.0, "3": 0.0})
+    by_category: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, li: LineItem) -> None:
+        self.total_kg += li.co2e_kg
+        self.by_scope[li.scope] = self.by_scope.get(li.scope, 0.0) + li.co2e_kg
+        self.by_category[li.category] = self.by_category.get(li.category, 0.0) + li.co2e_kg
+
+def _line_item(activity_id: int, scope: str, category: str, unit: str, quantity: float, factor, co2e_kg: float) -> LineItem:
+    return LineItem(
+        activity_id=activity_id,
+        category=category,
+        scope=scope,
+        unit=unit,
+        quantity=quantity,
+        factor_value=float(factor.factor_value),
+        factor_unit=factor.input_unit,
+        dataset=factor.dataset,
+        region=factor.region,
+        year=factor.year,
+        version=factor.version,
+        co2e_kg=co2e_kg,
+    )
+
+def _ranked_factors(region: Optional[str] = None, keys: Optional[Iterable[Tuple[str, str]]] = None):
+    """Subquery of factor ids ranked per (category, input_unit), best first (rn == 1).
+    Applies the same region filter and year/id preference as `FactorIndex.pick`.
+    """
+    rn = func.row_number().over(
+        partition_by=(EmissionFactor.category, EmissionFactor.input_unit),
+        order_by=(EmissionFactor.year.desc().nullslast(), EmissionFactor.id.desc()),
+    )
+    stmt = select(
+        EmissionFactor.id.label("factor_id"),
+        EmissionFactor.category.label("category"),
+        EmissionFactor.input_unit.label("input_unit"),
+        EmissionFactor.factor_value.label("factor_value"),
+        rn.label("rn"),
     )
     if region:
-        q = q.filter(or_(EmissionFactor.region == region, EmissionFactor.region.is_(None)))
-    # if no region provided, don't constrain by region at all
+        stmt = stmt.where(or_(EmissionFactor.region == region, EmissionFactor.region.is_(None)))
+    if keys is not None:
+        stmt = stmt.where(tuple_(EmissionFactor.category, EmissionFactor.input_unit).in_(list(keys)))
+    return stmt.subquery("ranked_factors")
+
+def use_stored(region: Optional[str]) -> bool:
+    """Whether the per-activity factor_id/co2e_kg columns answer for `region`."""
+    return settings.stored_emissions and (region or None) == settings.default_region
 
-    # prefer most recent then highest id
-    q = q.order_by(EmissionFactor.year.desc().nullslast(), EmissionFactor.id.desc())
-    return q.first()
+def _in_period(org_id: int, period_start, period_end):
+    """Filter for an org's activities overlapping [period_start, period_end]."""
+    return and_(
+        Activity.org_id == org_id,
+        Activity.period_end >= period_start,
+        Activity.period_start <= period_end,
+    )
 
 def run_calculation(
     db: Session,
     org_id: int,
     period_start,
     period_end,
-    region: Optional[str] = "US"
+    region: Optional[str] = "US",
+    engine: Optional[str] = None,
+    include_items: bool = True,
 ) -> Tuple[List[LineItem], Dict[str, float], Dict[str, float]]:
-    activities = (
-        db.query(Activity)
-        .filter(
-            Activity.org_id == org_id,
-            Activity.period_end >= period_start,
-            Activity.period_start <= period_end,
+    """Compute line items and scope/category totals for an org and period.
+
+    `engine` selects the implementation ("python" or "numpy", default from
+    settings.calc_engine); both return identical results. For the default
+    region, `None` or "stored" reads the per-activity co2e_kg kept by
+    `app.services.emissions` instead (see `use_stored`). With
+    `include_items=False` only the totals are computed and `items` is empty.
+    """
+    if engine in (None, "stored") and use_stored(region):
+        from app.services.calc_stored import run_calculation_stored
+
+        return run_calculation_stored(db, org_id, period_start, period_end, include_items=include_items)
+    if engine in (None, "stored"):
+        engine = settings.calc_engine
+    if engine == "numpy":
+        from app.services.calc_numpy import run_calculation_numpy
+
+        return run_calculation_numpy(
+            db, org_id, period_start, period_end, region=region, include_items=include_items
+        )
+    if engine != "python":
+        raise ValueError(f"Unknown calculation engine: {engine}")
+
+    with span("load_activities"):
+        activities = (
+            db.query(Activity)
+            .filter(_in_period(org_id, period_start, period_end))
+            .all()
         )
-        .all()
-    )
 
     items: List[LineItem] = []
     by_scope: Dict[str, float] = {"1": 0.0, "2": 0.0, "3": 0.0}
     by_category: Dict[str, float] = {}
 
-    for a in activities:
-        factor = _pick_factor(db, a.category, a.unit, region=region)
-        if not factor:
-            # skip unmapped for now; later we can return a warnings list
-            continue
-        co2e_kg = float(a.quantity) * float(factor.factor_value)
-
-        li = LineItem(
-            activity_id=a.id,
-            category=a.category,
-            scope=str(a.scope),
-            unit=a.unit,
-            quantity=float(a.quantity),
-            factor_value=float(factor.factor_value),
-            factor_unit=factor.input_unit,
-            dataset=factor.dataset,
-            region=factor.region,
-            year=factor.year,
-            version=factor.version,
-            co2e_kg=co2e_kg,
-        )
-        items.append(li)
-        by_scope[str(a.scope)] = by_scope.get(str(a.scope), 0.0) + co2e_kg
-        by_category[a.category] = by_category.get(a.category, 0.0) + co2e_kg
+    with span("resolve_factors"):
+        factors = factor_index.pick_many(db, {(a.category, a.unit) for a in activities}, region=region)
+
+    with span("aggregate"):
+        for a in activities:
+            factor = factors.get((a.category, a.unit))
+            if not factor:
+                # skip unmapped for now; later we can return a warnings list
+                continue
+            co2e_kg = float(a.quantity) * float(factor.factor_value)
+
+            if include_items:
+                items.append(_line_item(a.id, str(a.scope), a.category, a.unit, float(a.quantity), factor, co2e_kg))
+            by_scope[str(a.scope)] = by_scope.get(str(a.scope), 0.0) + co2e_kg
+            by_category[a.category] = by_category.get(a.category, 0.0) + co2e_kg
 
     return items, by_scope, by_category
+
+def calculation_json(
+    org_id: int,
+    period_start,
+    period_end,
+    items: List[LineItem],
+    by_scope: Dict[str, float],
+    by_category: Dict[str, float],
+    shape: str = "rows",
+) -> bytes:
+    """Encode a result in the `CalculationResult` layout without building models.
+
+    orjson writes the slotted line items directly. With shape="columns",
+    `items` is instead one array per LineItem field, which is several times
+    smaller and faster to produce for large results.
+    """
+    total_kg = sum((i.co2e_kg for i in items), 0.0)
+    if shape == "columns":
+        columns = list(zip(*map(_line_item_values, items))) or [()] * len(LINE_ITEM_FIELDS)
+        items = dict(zip(LINE_ITEM_FIELDS, columns))
+    elif shape != "rows":
+        raise ValueError(f"Unknown result shape: {shape}")
+    return orjson.dumps({
+        "org_id": org_id,
+        "period_start": period_start,
+        "period_end": period_end,
+        "total_kg": total_kg,
+        "by_scope": by_scope,
+        "by_category": by_category,
+        "items": items,
+    })
+
+def run_calculation_json(
+    db: Session,
+    org_id: int,
+    period_start,
+    period_end,
+    region: Optional[str] = "US",
+    engine: Optional[str] = None,
+    shape: str = "rows",
+) -> bytes:
+    """`run_calculation` encoded straight to JSON bytes in the `CalculationResult` layout."""
+    items, by_scope, by_category = run_calculation(
+        db=db,
+        org_id=org_id,
+        period_start=period_start,
+        period_end=period_end,
+        region=region,
+        engine=engine,
+    )
+    with span("serialize", engine or settings.calc_engine):
+        return calculation_json(org_id, period_start, period_end, items, by_scope, by_category, shape=shape)
+
+def iter_line_items(
+    db: Session,
+    org_id: int,
+    period_start,
+    period_end,
+    region: Optional[str] = "US",
+    batch_size: int = 1000,
+) -> Iterator[LineItem]:
+    """Yield line items as activities stream in from a server-side cursor.
+
+    Only `batch_size` activities are held at a time; factors are resolved per
+    batch from the in-memory index.
+    """
+    stmt = (
+        select(Activity.id, Activity.scope, Activity.category, Activity.unit, Activity.quantity)
+        .where(_in_period(org_id, period_start, period_end))
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in db.execute(stmt).partitions():
+        factors = factor_index.pick_many(db, {(r.category, r.unit) for r in batch}, region=region)
+        for r in batch:
+            factor = factors.get((r.category, r.unit))
+            if not factor:
+                continue
+            co2e_kg = float(r.quantity) * float(factor.factor_value)
+            yield _line_item(r.id, str(r.scope), r.category, r.unit, float(r.quantity), factor, co2e_kg)
+
+def _summary_stmt(org_id: int, period_start, period_end, group_by: str = "scope", region: Optional[str] = "US"):
+    col = Activity.scope if group_by == "scope" else Activity.category
+    ranked = _ranked_factors(region=region)
+    return (
+        select(col, func.sum(Activity.quantity * ranked.c.factor_value))
+        .join(
+            ranked,
+            and_(
+                ranked.c.category == Activity.category,
+                ranked.c.input_unit == Activity.unit,
+                ranked.c.rn == 1,
+            ),
+        )
+        .where(_in_period(org_id, period_start, period_end))
+        .group_by(col)
+        .order_by(col)
+    )
+
+def _stored_summary_stmt(org_id: int, period_start, period_end, group_by: str = "scope"):
+    col = Activity.scope if group_by == "scope" else Activity.category
+    return (
+        select(col, func.sum(Activity.co2e_kg))
+        .where(_in_period(org_id, period_start, period_end), Activity.factor_id.is_not(None))
+        .group_by(col)
+        .order_by(col)
+    )
+
+def summarize_emissions(
+    db: Session,
+    org_id: int,
+    period_start,
+    period_end,
+    group_by: str = "scope",
+    region: Optional[str] = "US",
+) -> Dict[str, float]:
+    """Scope or category totals computed in a single database-side aggregation.
+
+    Joins activities to their selected factor and returns
+    SUM(quantity * factor_value) per group, so only a handful of rows reach Python.
+    For the default region the stored co2e_kg is summed instead, with no join.
+    """
+    if use_stored(region):
+        stmt = _stored_summary_stmt(org_id, period_start, period_end, group_by=group_by)
+    else:
+        stmt = _summary_stmt(org_id, period_start, period_end, group_by=group_by, region=region)
+    totals: Dict[str, float] = {"1": 0.0, "2": 0.0, "3": 0.0} if group_by == "scope" else {}
+    for key, total in db.execute(stmt):
+        totals[str(key)] = float(total or 0.0)
+    return totals
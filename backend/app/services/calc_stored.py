@@ -0,0 +1,54 @@
+# backend/app/services/calc_stored.py
+"""`run_calculation` from the per-activity columns stamped by `emissions`.
+
+Only valid for `settings.default_region`, the region the stored factor_id and
+co2e_kg were selected for. No factor selection or multiply happens here: the
+rows are read and summed in the same order as the Python engine, and the
+factor fields of line items come from the index by id.
+"""
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.metrics import span
+from app.models import Activity
+from app.services.calc import LineItem, _in_period, _line_item
+from app.services.factors import factor_index
+
+
+def run_calculation_stored(
+    db: Session,
+    org_id: int,
+    period_start,
+    period_end,
+    include_items: bool = True,
+) -> Tuple[List[LineItem], Dict[str, float], Dict[str, float]]:
+    with span("load_activities", "stored"):
+        rows = db.execute(
+            select(
+                Activity.id, Activity.scope, Activity.category, Activity.unit, Activity.quantity,
+                Activity.factor_id, Activity.co2e_kg,
+            ).where(_in_period(org_id, period_start, period_end), Activity.factor_id.is_not(None))
+        ).all()
+
+    items: List[LineItem] = []
+    by_scope: Dict[str, float] = {"1": 0.0, "2": 0.0, "3": 0.0}
+    by_category: Dict[str, float] = {}
+
+    if include_items:
+        with span("resolve_factors", "stored"):
+            # stored ids may be newer than this process's index
+            factor_index.ensure_current(db)
+            factors = {fid: factor_index.get(db, fid) for fid in {r.factor_id for r in rows}}
+
+    with span("aggregate", "stored"):
+        for activity_id, scope, category, unit, quantity, factor_id, co2e_kg in rows:
+            scope = str(scope)
+            if include_items:
+                items.append(_line_item(activity_id, scope, category, unit, float(quantity), factors[factor_id], co2e_kg))
+            by_scope[scope] = by_scope.get(scope, 0.0) + co2e_kg
+            by_category[category] = by_category.get(category, 0.0) + co2e_kg
+
+    return items, by_scope, by_category
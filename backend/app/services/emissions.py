@@ -0,0 +1,141 @@
+# backend/app/services/emissions.py
+"""Per-activity emissions kept in the activities table.
+
+Every activity carries the factor selected for `settings.default_region`
+(`factor_id`) and the resulting `co2e_kg`, stamped when it is inserted. When
+factors change, only the (category, unit) selections they touch are
+recomputed, each with one set-based UPDATE that skips rows already correct,
+so a factor release rewrites the affected activities instead of all of them.
+`factor_import` runs that recompute in the import's own transaction, so the
+stored values move together with the factors and the factors version bump.
+`check` compares the stored values against a fresh selection.
+"""
+from __future__ import annotations
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Activity
+from app.services.calc import _ranked_factors
+from app.services.factors import factor_index
+from app.services.versions import bump_factors
+
+CHECK_BATCH = 50_000
+
+Pair = Tuple[str, str]
+
+
+def selection(db: Session, category: str, unit: str, quantity: float) -> Tuple[Optional[int], Optional[float]]:
+    """(factor_id, co2e_kg) for one activity; (None, None) when unmapped."""
+    factor_index.ensure_current(db)
+    f = factor_index.pick(db, category, unit, region=settings.default_region)
+    if f is None:
+        return None, None
+    return f.id, float(quantity) * float(f.factor_value)
+
+
+def stamp(db: Session, values: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill factor_id / co2e_kg on prepared activity values, in place."""
+    factor_index.ensure_current(db)
+    factors = factor_index.pick_many(db, {(v["category"], v["unit"]) for v in values}, region=settings.default_region)
+    for v in values:
+        f = factors.get((v["category"], v["unit"]))
+        v["factor_id"] = f.id if f else None
+        v["co2e_kg"] = float(v["quantity"]) * float(f.factor_value) if f else None
+    return values
+
+
+def affected_pairs(keys: Iterable[Tuple[str, str, Optional[str]]]) -> List[Pair]:
+    """(category, unit) selections a change to factors with these
+    (category, input_unit, region) keys can move for the default region."""
+    return sorted({(c, u) for c, u, region in keys if region in (None, settings.default_region)})
+
+
+def recompute_pairs(db: Session, pairs: Iterable[Pair]) -> int:
+    """Rewrite stored emissions of these (category, unit) selections; returns rows updated.
+
+    The caller owns the transaction. Factors are selected in SQL rather than
+    from the index so uncommitted factor changes in the same transaction count.
+    """
+    pairs = sorted({(c, u) for c, u in pairs})
+    if not pairs:
+        return 0
+    ranked = _ranked_factors(region=settings.default_region, keys=pairs)
+    factors = {
+        (r.category, r.input_unit): (r.factor_id, r.factor_value)
+        for r in db.execute(select(ranked).where(ranked.c.rn == 1))
+    }
+    updated = 0
+    for category, unit in pairs:
+        factor_id, factor_value = factors.get((category, unit), (None, None))
+        co2e_kg = Activity.quantity * float(factor_value) if factor_id is not None else None
+        stmt = (
+            update(Activity)
+            .where(
+                Activity.category == category,
+                Activity.unit == unit,
+                Activity.factor_id.is_distinct_from(factor_id)
+                | Activity.co2e_kg.is_distinct_from(co2e_kg),
+            )
+            .values(factor_id=factor_id, co2e_kg=co2e_kg)
+            .execution_options(synchronize_session=False)
+        )
+        updated += db.execute(stmt).rowcount
+    return updated
+
+
+def recompute(db: Session, pairs: Optional[Iterable[Pair]] = None) -> int:
+    """Bring stored emissions in line with the current factors; returns rows updated.
+
+    `pairs=None` means every selection. Commits. Rows that changed bump the
+    factors version, so results cached before the recompute are not served
+    after it.
+    """
+    if pairs is None:
+        pairs = db.execute(select(Activity.category, Activity.unit).distinct()).all()
+    updated = recompute_pairs(db, pairs)
+    if updated:
+        bump_factors(db)
+    db.commit()
+    return updated
+
+
+def check(db: Session, org_id: Optional[int] = None, rel_tol: float = 1e-9, examples: int = 20) -> Dict[str, Any]:
+    """Compare stored factor_id / co2e_kg with a fresh default-region selection."""
+    factor_index.ensure_current(db)
+    stmt = select(
+        Activity.id, Activity.category, Activity.unit, Activity.quantity, Activity.factor_id, Activity.co2e_kg
+    ).order_by(Activity.id)
+    if org_id is not None:
+        stmt = stmt.where(Activity.org_id == org_id)
+    checked = 0
+    mismatched: Dict[Pair, int] = {}
+    samples: List[Dict[str, Any]] = []
+    for batch in db.execute(stmt.execution_options(yield_per=CHECK_BATCH)).partitions():
+        factors = factor_index.pick_many(db, {(r.category, r.unit) for r in batch}, region=settings.default_region)
+        for r in batch:
+            checked += 1
+            f = factors.get((r.category, r.unit))
+            want_id = f.id if f else None
+            want_kg = float(r.quantity) * float(f.factor_value) if f else None
+            if r.factor_id == want_id and (
+                r.co2e_kg == want_kg
+                or (r.co2e_kg is not None and want_kg is not None and math.isclose(r.co2e_kg, want_kg, rel_tol=rel_tol))
+            ):
+                continue
+            key = (r.category, r.unit)
+            mismatched[key] = mismatched.get(key, 0) + 1
+            if len(samples) < examples:
+                samples.append({
+                    "id": r.id, "category": r.category, "unit": r.unit,
+                    "stored": [r.factor_id, r.co2e_kg], "expected": [want_id, want_kg],
+                })
+    return {
+        "checked": checked,
+        "mismatched": sum(mismatched.values()),
+        "pairs": sorted([c, u] for c, u in mismatched),
+        "examples": samples,
+    }
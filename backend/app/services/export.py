@@ -0,0 +1,223 @@
+# backend/app/services/export.py
+"""Columnar bulk export of activities and calculated line items.
+
+Rows come off a server-side cursor (`yield_per`) one batch at a time, become
+an Arrow record batch, and are written straight to the sink as a Parquet row
+group or an Arrow IPC stream message, both zstd-compressed. Memory stays at
+about one batch however large the export is.
+
+pyarrow is imported on first use so it stays out of the API's startup path.
+"""
+from __future__ import annotations
+import io
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Activity
+from app.services.factors import factor_index
+from app.storage import get_storage
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+KINDS = ("activities", "line_items")
+BATCH_SIZE = 50_000
+SPOOL_BYTES = 64 * 1024 * 1024  # larger exports spill to a temp file before upload
+
+ACTIVITY_COLUMNS = (
+    "id", "org_id", "scope", "category", "unit", "quantity",
+    "period_start", "period_end", "source_id", "notes", "data_quality",
+)
+LINE_ITEM_COLUMNS = (
+    "activity_id", "org_id", "period_start", "period_end", "scope", "category", "unit", "quantity",
+    "factor_id", "factor_value", "factor_unit", "dataset", "region", "year", "version", "co2e_kg",
+)
+
+
+@dataclass
+class ExportFilters:
+    org_ids: Optional[Sequence[int]] = None
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+    scope: Optional[str] = None
+    category: Optional[str] = None
+
+    def apply(self, stmt):
+        if self.org_ids:
+            stmt = stmt.where(Activity.org_id.in_(list(self.org_ids)))
+        if self.period_start:
+            stmt = stmt.where(Activity.period_end >= self.period_start)
+        if self.period_end:
+            stmt = stmt.where(Activity.period_start <= self.period_end)
+        if self.scope:
+            stmt = stmt.where(Activity.scope == self.scope)
+        if self.category:
+            stmt = stmt.where(Activity.category == self.category)
+        return stmt
+
+
+def schema(kind: str):
+    import pyarrow as pa
+
+    if kind == "activities":
+        return pa.schema([
+            ("id", pa.int64()), ("org_id", pa.int64()), ("scope", pa.string()),
+            ("category", pa.string()), ("unit", pa.string()), ("quantity", pa.float64()),
+            ("period_start", pa.date32()), ("period_end", pa.date32()), ("source_id", pa.int64()),
+            ("notes", pa.string()), ("data_quality", pa.string()),
+        ])
+    if kind == "line_items":
+        return pa.schema([
+            ("activity_id", pa.int64()), ("org_id", pa.int64()), ("period_start", pa.date32()),
+            ("period_end", pa.date32()), ("scope", pa.string()), ("category", pa.string()),
+            ("unit", pa.string()), ("quantity", pa.float64()), ("factor_id", pa.int64()),
+            ("factor_value", pa.float64()), ("factor_unit", pa.string()), ("dataset", pa.string()),
+            ("region", pa.string()), ("year", pa.int32()), ("version", pa.string()), ("co2e_kg", pa.float64()),
+        ])
+    raise ValueError(f"Unknown export kind: {kind}")
+
+
+def _record_batch(columns: Sequence[str], rows: List[tuple], arrow_schema):
+    import pyarrow as pa
+
+    arrays = list(zip(*rows)) if rows else [()] * len(columns)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(col, type=arrow_schema.field(name).type) for name, col in zip(columns, arrays)],
+        schema=arrow_schema,
+    )
+
+
+def _stmt(columns: Sequence[str], filters: ExportFilters, batch_size: int):
+    stmt = select(*(getattr(Activity, c) for c in columns)).order_by(Activity.id)
+    return filters.apply(stmt).execution_options(yield_per=batch_size)
+
+
+def iter_activity_batches(db: Session, filters: ExportFilters, batch_size: int = BATCH_SIZE):
+    arrow_schema = schema("activities")
+    for rows in db.execute(_stmt(ACTIVITY_COLUMNS, filters, batch_size)).partitions():
+        yield _record_batch(ACTIVITY_COLUMNS, rows, arrow_schema)
+
+
+def iter_line_item_batches(
+    db: Session, filters: ExportFilters, region: Optional[str] = "US", batch_size: int = BATCH_SIZE
+):
+    """Line items as in `run_calculation`, with org and period columns added."""
+    arrow_schema = schema("line_items")
+    source = ("id", "org_id", "period_start", "period_end", "scope", "category", "unit", "quantity")
+    for batch in db.execute(_stmt(source, filters, batch_size)).partitions():
+        factors = factor_index.pick_many(db, {(r.category, r.unit) for r in batch}, region=region)
+        rows = []
+        for r in batch:
+            f = factors.get((r.category, r.unit))
+            if not f:
+                continue  # unmapped activities are skipped, as in the calculation
+            quantity = float(r.quantity)
+            rows.append((
+                r.id, r.org_id, r.period_start, r.period_end, str(r.scope), r.category, r.unit, quantity,
+                f.id, float(f.factor_value), f.input_unit, f.dataset, f.region, f.year, f.version,
+                quantity * float(f.factor_value),
+            ))
+        yield _record_batch(LINE_ITEM_COLUMNS, rows, arrow_schema)
+
+
+def iter_batches(db: Session, kind: str, filters: ExportFilters, region: Optional[str] = "US", batch_size: int = BATCH_SIZE):
+    if kind == "activities":
+        return iter_activity_batches(db, filters, batch_size)
+    if kind == "line_items":
+        return iter_line_item_batches(db, filters, region, batch_size)
+    raise ValueError(f"Unknown export kind: {kind}")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _writer(kind: str, fmt: str, sink):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema(kind), compression="zstd")
+    if fmt == "arrow":
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        return pa.ipc.new_stream(sink, schema(kind), options=options)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def _write_batch(writer, batch) -> None:
+    if batch.num_rows:
+        writer.write_batch(batch)
+
+
+def write_export(batches, kind: str, fmt: str, fileobj) -> int:
+    """Write all `batches` to a binary file object; returns the row count."""
+    rows = 0
+    writer = _writer(kind, fmt, fileobj)
+    try:
+        for batch in batches:
+            _write_batch(writer, batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+def stream_export(batches, kind: str, fmt: str) -> Iterator[bytes]:
+    """Encoded export as byte chunks, roughly one per record batch."""
+    sink = _ChunkSink()
+    writer = _writer(kind, fmt, sink)
+    try:
+        for batch in batches:
+            _write_batch(writer, batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def save_export(
+    db: Session,
+    kind: str,
+    fmt: str,
+    filters: ExportFilters,
+    region: Optional[str] = "US",
+    key: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """Write an export to the configured storage; returns its URI and row count."""
+    key = key or f"exports/{kind}/{uuid.uuid4().hex}.{FORMATS[fmt][1]}"
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as spool:
+        rows = write_export(iter_batches(db, kind, filters, region, batch_size), kind, fmt, spool)
+        size = spool.tell()
+        spool.seek(0)
+        uri = get_storage().save(key, spool)
+    return {"uri": uri, "kind": kind, "format": fmt, "rows": rows, "bytes": size}
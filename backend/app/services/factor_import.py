@@ -0,0 +1,197 @@
+# backend/app/services/factor_import.py
+"""Streaming bulk import of emission factor datasets.
+
+A factor file (CSV, JSON Lines or a JSON array) is read row by row and
+upserted in batches on the unique key (dataset, region, category, input_unit,
+year). Each batch pre-selects the stored rows for its keys so the report can
+tell inserted, updated and unchanged apart; changed rows are updated by id and
+new ones go through INSERT ... ON CONFLICT DO UPDATE, which also absorbs a
+concurrent import of the same key. The whole file is one transaction, so a
+dataset release is either fully loaded or not at all; the stored emissions of
+the activities it affects are recomputed in that same transaction.
+"""
+from __future__ import annotations
+import codecs
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.db import dialect_insert
+from app.models import EmissionFactor
+from app.services import emissions
+from app.services.factors import mark_factors_changed
+from app.services.ingest import _csv_rows, _validation_messages
+from app.services.versions import bump_factors
+
+BATCH_SIZE = 5000
+FORMATS = ("csv", "jsonl", "json")
+
+FactorKey = Tuple[str, Optional[str], str, str, Optional[int]]
+
+
+@dataclass
+class FactorImportReport:
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    recomputed: int = 0  # activities whose stored emissions changed
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    # (category, input_unit, region) of every inserted or updated factor
+    changed_keys: Set[Tuple[str, str, Optional[str]]] = field(default_factory=set)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    def error(self, index: int, *messages: str) -> None:
+        self.errors.append({"index": index, "errors": list(messages)})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "duplicates": self.duplicates,
+            "recomputed": self.recomputed,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def _key(f) -> FactorKey:
+    return (f.dataset, f.region, f.category, f.input_unit, f.year)
+
+
+def _jsonl_rows(stream) -> Iterator[Any]:
+    for n, line in enumerate(codecs.getreader("utf-8-sig")(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            # keep the row slot so the report says which line was bad
+            yield ValueError(f"line {n}: invalid JSON ({e})")
+
+
+def read_factor_rows(stream, fmt: str) -> Iterable[Dict[str, Any]]:
+    """Raw rows from a binary file object; csv and jsonl are read lazily."""
+    if fmt == "csv":
+        return _csv_rows(stream)
+    if fmt == "jsonl":
+        return _jsonl_rows(stream)
+    if fmt == "json":
+        # a JSON array has to be parsed whole; factor files are small enough
+        return json.load(codecs.getreader("utf-8-sig")(stream))
+    raise ValueError(f"Unknown factor file format: {fmt}")
+
+
+def _existing(db: Session, keys: Iterable[FactorKey]) -> Dict[FactorKey, Any]:
+    # match on the NOT NULL columns in SQL; NULL region/year are compared here
+    pairs = {(k[0], k[2], k[3]) for k in keys}
+    rows = db.execute(
+        select(
+            EmissionFactor.id, EmissionFactor.dataset, EmissionFactor.region, EmissionFactor.category,
+            EmissionFactor.input_unit, EmissionFactor.year, EmissionFactor.factor_value, EmissionFactor.version,
+        ).where(tuple_(EmissionFactor.dataset, EmissionFactor.category, EmissionFactor.input_unit).in_(pairs))
+    )
+    return {_key(f): f for f in rows}
+
+
+def upsert_batch(db: Session, factors: List[schemas.FactorIn], report: FactorImportReport) -> None:
+    """Upsert validated factors; the caller owns the transaction."""
+    batch: Dict[FactorKey, schemas.FactorIn] = {}
+    for f in factors:
+        if _key(f) in batch:
+            report.duplicates += 1  # later rows of the same key win
+        batch[_key(f)] = f
+    if not batch:
+        return
+
+    stored = _existing(db, batch)
+    new: List[Dict[str, Any]] = []
+    changed: List[Dict[str, Any]] = []
+    for key, f in batch.items():
+        current = stored.get(key)
+        if current is None:
+            new.append(f.model_dump())
+        elif current.factor_value != f.factor_value or current.version != f.version:
+            changed.append({"id": current.id, "factor_value": f.factor_value, "version": f.version})
+        else:
+            report.unchanged += 1
+            continue
+        report.changed_keys.add((f.category, f.input_unit, f.region))
+
+    if changed:
+        db.execute(update(EmissionFactor), changed)
+        report.updated += len(changed)
+    if new:
+        insert = dialect_insert(db)
+        stmt = insert(EmissionFactor)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                EmissionFactor.dataset, EmissionFactor.region, EmissionFactor.category,
+                EmissionFactor.input_unit, EmissionFactor.year,
+            ],
+            set_={"factor_value": stmt.excluded.factor_value, "version": stmt.excluded.version},
+        )
+        db.execute(stmt, new)
+        report.inserted += len(new)
+    if changed or new:
+        mark_factors_changed(db)
+
+
+def import_factor_rows(
+    db: Session,
+    rows: Iterable[Any],
+    batch_size: int = BATCH_SIZE,
+    overrides: Optional[Dict[str, Any]] = None,
+    dry_run: bool = False,
+) -> FactorImportReport:
+    """Validate and upsert raw factor rows in batches inside one transaction.
+
+    `overrides` are forced onto every row (e.g. dataset and version for a
+    file that doesn't carry them). Bad rows are reported by index and skipped.
+    Stored activity emissions the changes move are recomputed before the
+    commit. With `dry_run` the counts are computed and the transaction rolled
+    back.
+    """
+    report = FactorImportReport()
+    rows = iter(enumerate(rows))
+    try:
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            valid: List[schemas.FactorIn] = []
+            for index, raw in chunk:
+                report.received += 1
+                if isinstance(raw, Exception):
+                    report.error(index, str(raw))
+                    continue
+                try:
+                    valid.append(schemas.FactorIn.model_validate({**raw, **(overrides or {})}))
+                except ValidationError as e:
+                    report.error(index, *_validation_messages(e))
+                except TypeError:
+                    report.error(index, "row: expected an object")
+            upsert_batch(db, valid, report)
+        if report.inserted or report.updated:
+            report.recomputed = emissions.recompute_pairs(db, emissions.affected_pairs(report.changed_keys))
+            bump_factors(db)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return report
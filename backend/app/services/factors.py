@@ -0,0 +1,211 @@
+# backend/app/services/factors.py
+"""Process-wide in-memory index of the emission_factors table.
+
+The table is small and rarely changes, so it is loaded once per process and
+answers every factor lookup from memory. The index is dropped when a session
+that touched factors commits (see `mark_factors_changed`) and, as a safety net
+for writes from other processes, after `settings.factor_index_ttl` seconds.
+"""
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import EmissionFactor
+from app.services.versions import factors_version
+
+
+@dataclass(frozen=True)
+class FactorRecord:
+    id: int
+    dataset: str
+    region: Optional[str]
+    category: str
+    input_unit: str
+    factor_value: float
+    year: Optional[int]
+    version: Optional[str]
+
+
+def _preference(f: FactorRecord):
+    # same order as calc._ranked_factors: year desc nulls last, then id desc
+    return (f.year is None, -(f.year or 0), -f.id)
+
+
+class FactorIndex:
+    def __init__(self, max_age: float = 0.0):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._by_key: Dict[Tuple[str, str, Optional[str]], List[FactorRecord]] = {}
+        self._by_pair: Dict[Tuple[str, str], List[FactorRecord]] = {}
+        self._picked: Dict[tuple, Optional[FactorRecord]] = {}
+        self._by_id: Dict[int, FactorRecord] = {}
+        self._loaded_at: Optional[float] = None
+        self._loaded_version: Optional[str] = None
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+            self._loaded_version = None
+
+    def _stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return bool(self.max_age) and time.monotonic() - self._loaded_at > self.max_age
+
+    def load(self, db: Session) -> None:
+        version = factors_version(db)  # read first: a concurrent change only makes us reload again
+        rows = db.query(EmissionFactor).all()
+        self.load_records(
+            (
+                FactorRecord(
+                    id=f.id,
+                    dataset=f.dataset,
+                    region=f.region,
+                    category=f.category,
+                    input_unit=f.input_unit,
+                    factor_value=float(f.factor_value),
+                    year=f.year,
+                    version=f.version,
+                )
+                for f in rows
+            ),
+            version=version,
+        )
+
+    def load_records(self, records: Iterable[FactorRecord], version: Optional[str] = None) -> None:
+        by_key: Dict[Tuple[str, str, Optional[str]], List[FactorRecord]] = {}
+        by_pair: Dict[Tuple[str, str], List[FactorRecord]] = {}
+        by_id: Dict[int, FactorRecord] = {}
+        for r in records:
+            by_id[r.id] = r
+            by_key.setdefault((r.category, r.input_unit, r.region), []).append(r)
+            by_pair.setdefault((r.category, r.input_unit), []).append(r)
+        for candidates in (*by_key.values(), *by_pair.values()):
+            candidates.sort(key=_preference)
+        with self._lock:
+            if version is not None and self._loaded_version is not None and int(version) < int(self._loaded_version):
+                return  # a concurrent load already installed newer factors
+            self._by_key, self._by_pair, self._picked, self._by_id = by_key, by_pair, {}, by_id
+            self._loaded_at = time.monotonic()
+            self._loaded_version = version
+            self.generation += 1
+            self.reloads += 1
+
+    def records(self) -> List[FactorRecord]:
+        with self._lock:
+            return [r for candidates in self._by_pair.values() for r in candidates]
+
+    @property
+    def version(self) -> Optional[str]:
+        """Factors version the index was loaded at (None if loaded without one)."""
+        return self._loaded_version
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._stale():
+            self.load(db)
+
+    def ensure_current(self, db: Session) -> None:
+        """Reload unless the index matches the committed factors version.
+
+        Costs one small query; for writers that persist a factor choice and
+        for results cached under a data version, which can't wait out the TTL.
+        """
+        if self._stale() or factors_version(db) != self._loaded_version:
+            self.load(db)
+
+    def get(self, db: Session, factor_id: int) -> Optional[FactorRecord]:
+        self.ensure_loaded(db)
+        return self._by_id.get(factor_id)
+
+    def _resolve(
+        self,
+        category: str,
+        unit: str,
+        region: Optional[str],
+        dataset: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> Optional[FactorRecord]:
+        if region:
+            candidates = self._by_key.get((category, unit, region), []) + self._by_key.get((category, unit, None), [])
+            if dataset is None and year is None:
+                return min(candidates, key=_preference) if candidates else None
+            candidates = sorted(candidates, key=_preference)
+        else:
+            candidates = self._by_pair.get((category, unit), [])
+        for f in candidates:
+            if dataset is not None and f.dataset != dataset:
+                continue
+            if year is not None and f.year is not None and f.year > year:
+                continue
+            return f
+        return None
+
+    def pick(self, db: Session, category: str, unit: str, region: Optional[str] = None) -> Optional[FactorRecord]:
+        return self.pick_many(db, [(category, unit)], region=region).get((category, unit))
+
+    def pick_many(
+        self,
+        db: Session,
+        keys: Iterable[Tuple[str, str]],
+        region: Optional[str] = None,
+        dataset: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> Dict[Tuple[str, str], FactorRecord]:
+        """Best factor per (category, unit); keys without a factor are left out.
+
+        `dataset` restricts candidates to one dataset; `year` pins factors as
+        of that year (newest not after it, undated ones as a last resort).
+        """
+        self.ensure_loaded(db)
+        out: Dict[Tuple[str, str], FactorRecord] = {}
+        with self._lock:
+            for category, unit in set(keys):
+                k = (category, unit, region or None, dataset, year)
+                if k in self._picked:
+                    self.hits += 1
+                    f = self._picked[k]
+                else:
+                    self.misses += 1
+                    f = self._picked[k] = self._resolve(category, unit, region, dataset, year)
+                if f is not None:
+                    out[(category, unit)] = f
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "factors": sum(len(c) for c in self._by_pair.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+            }
+
+
+factor_index = FactorIndex(max_age=settings.factor_index_ttl)
+
+
+def mark_factors_changed(db: Session) -> None:
+    """Drop the index once `db` commits its factor changes."""
+    db.info["factors_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop("factors_changed", False):
+        factor_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("factors_changed", None)
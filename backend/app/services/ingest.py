@@ -0,0 +1,233 @@
+# backend/app/services/ingest.py
+"""Batch activity ingestion shared by the bulk endpoint and the upload worker.
+
+Rows are validated and unit-normalized one batch at a time and written with a
+single multi-row INSERT per batch. Bad rows are reported by index and skipped;
+they never abort the good rows around them.
+"""
+from __future__ import annotations
+import codecs
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.core.config import settings
+from app.storage import get_storage
+from app.services import emissions, rollup
+from app.services.versions import bump_orgs
+from app.utils.units import convert_many, convert_to_canonical
+
+BATCH_SIZE = 5000
+# Redis list of Source ids waiting for the worker
+INGEST_QUEUE = "ingest:sources"
+
+
+@dataclass
+class IngestReport:
+    received: int = 0
+    inserted: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    def error(self, index: int, *messages: str) -> None:
+        self.errors.append({"index": index, "errors": list(messages)})
+
+
+def _validation_messages(e: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+        for err in e.errors(include_url=False)
+    ]
+
+
+def _row_values(payload: schemas.ActivityCreate, can_unit: str, can_qty: float, note: str) -> Dict[str, Any]:
+    return {
+        "org_id": payload.org_id,
+        "scope": payload.scope,
+        "category": payload.category,
+        "unit": can_unit,
+        "quantity": can_qty,
+        "period_start": payload.period_start,
+        "period_end": payload.period_end,
+        "source_id": payload.source_id,
+        # append conversion note (optional)
+        "notes": (payload.notes + " | " if payload.notes else "") + (note or ""),
+        "data_quality": payload.data_quality,
+    }
+
+
+def activity_values(payload: schemas.ActivityCreate) -> Dict[str, Any]:
+    """Column values for a validated activity, normalized to the canonical unit.
+
+    Raises ValueError for an invalid period or an unconvertible unit.
+    """
+    if payload.period_start > payload.period_end:
+        raise ValueError("Invalid period range")
+    return _row_values(payload, *convert_to_canonical(payload.category, payload.unit, payload.quantity))
+
+
+def prepare_batch(
+    rows: Iterable[Tuple[int, Any]], report: IngestReport, overrides: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Validate and normalize (index, raw row) pairs; failures go to `report`.
+
+    Units are converted once per (category, unit) group with `convert_many`.
+    `overrides` are forced onto every row (e.g. the org and source of an upload).
+    """
+    groups: Dict[Tuple[str, str], List[Tuple[int, schemas.ActivityCreate]]] = {}
+    for index, raw in rows:
+        report.received += 1
+        if isinstance(raw, Exception):
+            report.error(index, str(raw))
+            continue
+        if not isinstance(raw, dict):
+            report.error(index, "row: expected an object")
+            continue
+        try:
+            payload = schemas.ActivityCreate.model_validate({**raw, **(overrides or {})})
+        except ValidationError as e:
+            report.error(index, *_validation_messages(e))
+            continue
+        if payload.period_start > payload.period_end:
+            report.error(index, "Invalid period range")
+            continue
+        groups.setdefault((payload.category, payload.unit), []).append((index, payload))
+
+    values: List[Dict[str, Any]] = []
+    for (category, unit), members in groups.items():
+        try:
+            can_unit, quantities, notes = convert_many(category, unit, [p.quantity for _, p in members])
+        except ValueError:
+            # per-row messages carry the quantity, so rebuild them one by one
+            for index, payload in members:
+                try:
+                    convert_to_canonical(category, unit, payload.quantity)
+                except ValueError as e:
+                    report.error(index, str(e))
+            continue
+        for (index, payload), qty, note in zip(members, quantities.tolist(), notes):
+            values.append({"_index": index, **_row_values(payload, can_unit, qty, note)})
+    values.sort(key=lambda v: v["_index"])
+    return values
+
+
+def _drop_unknown_sources(db: Session, values: List[Dict[str, Any]], report: IngestReport) -> List[Dict[str, Any]]:
+    # a dangling source_id would fail the FK and take the whole batch with it
+    wanted = {(v["org_id"], v["source_id"]) for v in values if v["source_id"] is not None}
+    if not wanted:
+        return values
+    ids = {sid for _, sid in wanted}
+    known = set(
+        db.execute(select(models.Source.org_id, models.Source.id).where(models.Source.id.in_(ids))).all()
+    )
+    kept = []
+    for v in values:
+        if v["source_id"] is not None and (v["org_id"], v["source_id"]) not in known:
+            report.error(v["_index"], f"source_id: unknown source {v['source_id']} for org {v['org_id']}")
+        else:
+            kept.append(v)
+    return kept
+
+
+def insert_batch(db: Session, values: List[Dict[str, Any]], report: IngestReport) -> None:
+    """Multi-row INSERT of prepared values; the caller owns the transaction."""
+    values = _drop_unknown_sources(db, values, report)
+    if not values:
+        return
+    for v in values:
+        v.pop("_index", None)
+    emissions.stamp(db, values)
+    db.execute(insert(models.Activity), values)
+    rollup.add_activities(db, values)
+    bump_orgs(db, {v["org_id"] for v in values})
+    report.inserted += len(values)
+
+
+def ingest_rows(
+    db: Session,
+    rows: Iterable[Any],
+    batch_size: int = BATCH_SIZE,
+    overrides: Optional[Dict[str, Any]] = None,
+) -> IngestReport:
+    """Ingest raw activity rows in batches inside one transaction."""
+    report = IngestReport()
+    batch: List[Tuple[int, Any]] = []
+    try:
+        for index, raw in enumerate(rows):
+            batch.append((index, raw))
+            if len(batch) >= batch_size:
+                insert_batch(db, prepare_batch(batch, report, overrides), report)
+                batch = []
+        if batch:
+            insert_batch(db, prepare_batch(batch, report, overrides), report)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    report.errors.sort(key=lambda e: e["index"])
+    return report
+
+
+def _csv_rows(stream) -> Iterable[Dict[str, str]]:
+    # decode lazily so only the current line is ever held as text
+    for row in csv.DictReader(codecs.getreader("utf-8-sig")(stream)):
+        # blank cells mean "not given", so optional fields fall back to defaults
+        yield {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+
+
+def claim_source(db: Session, source_id: int) -> bool:
+    """Move an uploaded source to processing; False if someone else got it."""
+    res = db.execute(
+        update(models.Source)
+        .where(models.Source.id == source_id, models.Source.status == "uploaded")
+        .values(status="processing", rows_processed=0, rows_inserted=0, rows_failed=0, error=None)
+    )
+    db.commit()
+    return res.rowcount == 1
+
+
+def process_source(db: Session, source_id: int, chunk_size: Optional[int] = None) -> Optional[models.Source]:
+    """Stream an uploaded CSV into activities, `chunk_size` rows per transaction.
+
+    Progress counters on the Source are committed together with each chunk.
+    Returns None if the source was not in the `uploaded` state.
+    """
+    if not claim_source(db, source_id):
+        return None
+    chunk_size = chunk_size or settings.ingest_chunk_size
+    source = db.get(models.Source, source_id)
+    overrides = {"org_id": source.org_id, "source_id": source.id}
+    try:
+        stream = get_storage().open(source.storage_uri)
+        try:
+            rows = enumerate(_csv_rows(stream))
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                report = IngestReport()
+                insert_batch(db, prepare_batch(chunk, report, overrides), report)
+                source.rows_processed += report.received
+                source.rows_inserted += report.inserted
+                source.rows_failed += report.failed
+                db.commit()
+        finally:
+            stream.close()
+        source.status = "completed"
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        source.status = "failed"
+        source.error = str(e)[:2000]
+        db.commit()
+        raise
+    return source
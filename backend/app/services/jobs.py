@@ -0,0 +1,97 @@
+# backend/app/services/jobs.py
+"""Asynchronous calculation jobs on Redis.
+
+The API submits a job (a hash `calc:job:<id>` plus the id on the `calc:jobs`
+list) and returns immediately; a worker process runs the calculation and
+stores the serialized CalculationResult under a cache key built from
+(org_id, period, region, data version). Later submissions with the same key
+are answered from that cache without queueing anything.
+"""
+from __future__ import annotations
+import json
+import uuid
+from datetime import date
+from typing import Any, Dict, Optional
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.calc import run_calculation_json
+from app.services.factors import factor_index
+from app.services.versions import data_version
+
+CALC_QUEUE = "calc:jobs"
+JOB_TTL = 24 * 3600
+
+
+def _job_key(job_id: str) -> str:
+    return f"calc:job:{job_id}"
+
+
+def result_key(org_id: int, period_start: date, period_end: date, region: Optional[str], version: str) -> str:
+    return f"calc:result:{org_id}:{period_start.isoformat()}:{period_end.isoformat()}:{region or '*'}:{version}"
+
+
+class CalcJobs:
+    def __init__(self, r: redis.Redis, result_ttl: Optional[int] = None):
+        self.r = r
+        self.result_ttl = result_ttl if result_ttl is not None else settings.calc_result_ttl
+
+    def submit(self, db: Session, org_id: int, period_start: date, period_end: date, region: Optional[str] = "US") -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        key = result_key(org_id, period_start, period_end, region, data_version(db, org_id))
+        job = {
+            "org_id": org_id,
+            "period_start": period_start.isoformat(),
+            "period_end": period_end.isoformat(),
+            "region": region or "",
+            "result_key": key,
+        }
+        cached = self.r.exists(key)
+        job["status"] = "done" if cached else "queued"
+        pipe = self.r.pipeline()
+        pipe.hset(_job_key(job_id), mapping=job)
+        pipe.expire(_job_key(job_id), JOB_TTL)
+        if not cached:
+            pipe.rpush(CALC_QUEUE, job_id)
+        pipe.execute()
+        return {"job_id": job_id, "status": job["status"]}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = {k.decode(): v.decode() for k, v in self.r.hgetall(_job_key(job_id)).items()}
+        if not job:
+            return None
+        out: Dict[str, Any] = {"job_id": job_id, "status": job["status"], "error": job.get("error") or None}
+        if job["status"] == "done":
+            payload = self.r.get(job["result_key"])
+            if payload is None:
+                # result evicted before the client came back for it
+                out.update(status="expired", error="result expired; resubmit the job")
+            else:
+                out["result"] = json.loads(payload)
+        return out
+
+    def run(self, db: Session, job_id: str) -> None:
+        """Execute a queued job (worker side)."""
+        key = _job_key(job_id)
+        job = {k.decode(): v.decode() for k, v in self.r.hgetall(key).items()}
+        if not job:
+            return
+        self.r.hset(key, "status", "running")
+        try:
+            org_id = int(job["org_id"])
+            period_start = date.fromisoformat(job["period_start"])
+            period_end = date.fromisoformat(job["period_end"])
+            region = job["region"] or None
+            # version first: if data changes mid-run the result is only ever newer than its key
+            rkey = result_key(org_id, period_start, period_end, region, data_version(db, org_id))
+            if not self.r.exists(rkey):
+                # another process may have changed factors since this one loaded its index
+                factor_index.ensure_current(db)
+                result = run_calculation_json(db, org_id, period_start, period_end, region=region)
+                self.r.set(rkey, result, ex=self.result_ttl)
+            self.r.hset(key, mapping={"status": "done", "result_key": rkey})
+        except Exception as e:
+            self.r.hset(key, mapping={"status": "failed", "error": str(e)[:2000]})
+            raise
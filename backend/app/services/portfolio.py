@@ -0,0 +1,127 @@
+# backend/app/services/portfolio.py
+"""Portfolio calculation: many orgs, one factor snapshot, a process pool.
+
+The factor table is loaded once in the parent and handed to each worker
+process, which pins it in its own factor index, so workers only read
+activities. Orgs are distributed over the pool; per-org totals come back and
+are rolled up into portfolio totals.
+
+The pool is shared by every run in the process and lives until
+`shutdown_pool` (the API calls it on shutdown), so concurrent runs queue on
+`settings.portfolio_workers` processes instead of each spawning its own.
+It is replaced when the factors version moves, keeping one snapshot per pool.
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.services.calc import run_calculation
+from app.services.factors import FactorRecord, factor_index
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_version: Optional[str] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(records: List[FactorRecord]) -> None:
+    factor_index.load_records(records)
+    factor_index.max_age = 0  # keep the parent's snapshot for the whole run
+
+
+def _org_totals(org_id: int, period_start: date, period_end: date, region: Optional[str], engine: Optional[str]) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        _, by_scope, by_category = run_calculation(
+            db, org_id, period_start, period_end, region=region, engine=engine, include_items=False
+        )
+    finally:
+        db.close()
+    return {"org_id": org_id, "total_kg": sum(by_scope.values()), "by_scope": by_scope, "by_category": by_category}
+
+
+def _add(into: Dict[str, float], other: Dict[str, float]) -> None:
+    for k, v in other.items():
+        into[k] = into.get(k, 0.0) + v
+
+
+def pool_size() -> int:
+    return settings.portfolio_workers or os.cpu_count() or 1
+
+
+def _shared_pool() -> ProcessPoolExecutor:
+    """The process pool, (re)created for the factor snapshot currently loaded."""
+    global _pool, _pool_version
+    with _pool_lock:
+        if _pool is None or _pool_version != factor_index.version:
+            if _pool is not None:
+                _pool.shutdown(wait=False)  # runs already queued on it still finish
+            # spawn, not fork: children must not inherit the parent's pooled connections
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(factor_index.records(),),
+            )
+            _pool_version = factor_index.version
+        return _pool
+
+
+def shutdown_pool(wait: bool = True) -> None:
+    global _pool, _pool_version
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=not wait)
+        _pool, _pool_version = None, None
+
+
+def run_portfolio(
+    org_ids: Sequence[int],
+    period_start: date,
+    period_end: date,
+    region: Optional[str] = "US",
+    workers: Optional[int] = None,
+    engine: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Per-org and rolled-up totals; `workers=1` runs in this process, anything
+    else on the shared pool."""
+    org_ids = list(dict.fromkeys(org_ids))  # dedupe, keep order
+    task = partial(_org_totals, period_start=period_start, period_end=period_end, region=region, engine=engine)
+
+    db = SessionLocal()
+    try:
+        factor_index.ensure_current(db)
+    finally:
+        db.close()
+
+    if workers == 1 or len(org_ids) == 1:
+        orgs = [task(o) for o in org_ids]
+    else:
+        chunksize = max(1, len(org_ids) // (pool_size() * 4))
+        try:
+            orgs = list(_shared_pool().map(task, org_ids, chunksize=chunksize))
+        except BrokenProcessPool:
+            shutdown_pool(wait=False)  # a worker died; start a fresh pool next time
+            raise
+
+    by_scope: Dict[str, float] = {"1": 0.0, "2": 0.0, "3": 0.0}
+    by_category: Dict[str, float] = {}
+    for o in orgs:
+        _add(by_scope, o["by_scope"])
+        _add(by_category, o["by_category"])
+    return {
+        "period_start": period_start,
+        "period_end": period_end,
+        "region": region,
+        "total_kg": sum(o["total_kg"] for o in orgs),
+        "by_scope": by_scope,
+        "by_category": by_category,
+        "orgs": orgs,
+    }
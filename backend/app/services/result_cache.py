@@ -0,0 +1,156 @@
+# backend/app/services/result_cache.py
+"""Serialized responses cached under their data version.
+
+Keys embed the version from `app.services.versions`, so an entry can never be
+served after the data under it changed; eviction (LRU by count, plus a TTL) is
+only about memory. The key doubles as the response's ETag, which lets a
+conditional request be answered from the version row alone.
+
+`SingleFlight` covers the gap before an entry exists: concurrent misses on
+the same key wait for the first one's computation instead of each running
+their own.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CALC_COALESCED
+
+
+def etag_for(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResultCache:
+    """LRU + TTL cache of encoded bodies, bounded by entry count and total bytes.
+
+    Bodies larger than `max_entry_bytes` are not cached at all: one large
+    org's result must not flush everyone else's.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int = 0, max_entry_bytes: int = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        if (self.max_entry_bytes and len(body) > self.max_entry_bytes) or (self.max_bytes and len(body) > self.max_bytes):
+            self.skipped += 1
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic(), body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= len(self._entries.pop(key)[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+            }
+
+
+class SingleFlight:
+    """Coalesce concurrent async computations of the same key (one event loop).
+
+    The first caller computes; callers arriving while it runs await the same
+    future and get its result or its exception. If the first caller is
+    cancelled (client went away), a waiter takes over and computes instead.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[bytes]], endpoint: str = "") -> bytes:
+        while (shared := self._inflight.get(key)) is not None:
+            try:
+                body = await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if shared.cancelled():
+                    continue
+                raise
+            self.coalesced += 1
+            CALC_COALESCED.labels(endpoint).inc()
+            return body
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't log it as unretrieved
+            raise
+        else:
+            future.set_result(body)
+            return body
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "coalesced": self.coalesced}
+
+
+result_cache = ResultCache(
+    max_entries=settings.response_cache_size,
+    ttl=settings.response_cache_ttl,
+    max_bytes=settings.response_cache_bytes,
+    max_entry_bytes=settings.response_cache_max_entry_bytes,
+)
+single_flight = SingleFlight()
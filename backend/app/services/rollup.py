@@ -0,0 +1,162 @@
+# backend/app/services/rollup.py
+"""Monthly emissions rollup.
+
+`emission_rollups` holds activity quantities summed per org, month of
+period_start, scope, category and unit. It is maintained incrementally by
+every activity insert path (`add_activities`), in the same transaction.
+Summaries read whole months from it, multiply by the currently selected
+factor, and only go to raw activities for the partial months at the edges
+of the requested range.
+"""
+from __future__ import annotations
+import calendar
+import math
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models import Activity, EmissionRollup
+from app.services.calc import _ranked_factors, _summary_stmt
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _month_end(d: date) -> date:
+    return d.replace(day=calendar.monthrange(d.year, d.month)[1])
+
+
+def full_months(period_start: date, period_end: date) -> Optional[Tuple[date, date]]:
+    """(first, last) month starts lying entirely inside the range, or None."""
+    first = period_start if period_start.day == 1 else _month_end(period_start) + timedelta(days=1)
+    last = month_start(period_end) if period_end == _month_end(period_end) else month_start(period_end) - timedelta(days=1)
+    last = month_start(last)
+    return (first, last) if first <= last else None
+
+
+def add_activities(db: Session, values: Iterable[Dict[str, Any]]) -> None:
+    """Fold newly inserted activity rows into the rollup (caller commits)."""
+    deltas: Dict[Tuple, List[float]] = {}
+    for v in values:
+        if v["org_id"] is None:
+            continue  # org-less rows can't be summarized, and the rollup key needs one
+        key = (v["org_id"], month_start(v["period_start"]), str(v["scope"]), v["category"], v["unit"])
+        d = deltas.setdefault(key, [0.0, 0])
+        d[0] += float(v["quantity"])
+        d[1] += 1
+    if not deltas:
+        return
+    insert_ = dialect_insert(db)
+    stmt = insert_(EmissionRollup).values(
+        [
+            {"org_id": o, "month": m, "scope": s, "category": c, "unit": u, "quantity": q, "activity_count": n}
+            for (o, m, s, c, u), (q, n) in sorted(deltas.items())
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            EmissionRollup.org_id, EmissionRollup.month, EmissionRollup.scope,
+            EmissionRollup.category, EmissionRollup.unit,
+        ],
+        set_={
+            "quantity": EmissionRollup.quantity + stmt.excluded.quantity,
+            "activity_count": EmissionRollup.activity_count + stmt.excluded.activity_count,
+        },
+    )
+    db.execute(stmt)
+
+
+def _month_of_period_start(db: Session):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(Activity.period_start, "start of month")
+    return func.date_trunc("month", Activity.period_start).cast(Activity.period_start.type)
+
+
+def _recomputed(db: Session, org_id: Optional[int] = None):
+    month = _month_of_period_start(db)
+    stmt = select(
+        Activity.org_id, month.label("month"), Activity.scope, Activity.category, Activity.unit,
+        func.sum(Activity.quantity).label("quantity"), func.count().label("activity_count"),
+    ).where(Activity.org_id.is_not(None)).group_by(Activity.org_id, month, Activity.scope, Activity.category, Activity.unit)
+    if org_id is not None:
+        stmt = stmt.where(Activity.org_id == org_id)
+    return stmt
+
+
+def rebuild(db: Session, org_id: Optional[int] = None) -> None:
+    """Replace the rollup (for one org or all) with a full recompute."""
+    clear = delete(EmissionRollup)
+    if org_id is not None:
+        clear = clear.where(EmissionRollup.org_id == org_id)
+    db.execute(clear)
+    db.execute(
+        insert(EmissionRollup).from_select(
+            ["org_id", "month", "scope", "category", "unit", "quantity", "activity_count"],
+            _recomputed(db, org_id),
+        )
+    )
+    db.commit()
+
+
+def check(db: Session, org_id: Optional[int] = None, rel_tol: float = 1e-9) -> List[str]:
+    """Differences between the stored rollup and a full recompute (empty = in sync)."""
+    def key(r):
+        m = r.month if isinstance(r.month, date) else date.fromisoformat(str(r.month)[:10])
+        return (r.org_id, m, str(r.scope), r.category, r.unit)
+
+    expected = {key(r): (r.quantity, r.activity_count) for r in db.execute(_recomputed(db, org_id))}
+    stored_q = select(EmissionRollup)
+    if org_id is not None:
+        stored_q = stored_q.where(EmissionRollup.org_id == org_id)
+    stored = {key(r): (r.quantity, r.activity_count) for r in db.scalars(stored_q)}
+
+    problems = []
+    for k in sorted(set(expected) | set(stored), key=str):
+        want, got = expected.get(k, (0.0, 0)), stored.get(k, (0.0, 0))
+        if want[1] != got[1] or not math.isclose(want[0], got[0], rel_tol=rel_tol, abs_tol=1e-9):
+            problems.append(f"{k}: rollup has {got[0]} over {got[1]} activities, recompute gives {want[0]} over {want[1]}")
+    return problems
+
+
+def summarize_from_rollup(
+    db: Session,
+    org_id: int,
+    period_start: date,
+    period_end: date,
+    group_by: str = "scope",
+    region: Optional[str] = "US",
+) -> Dict[str, float]:
+    """Same totals as `summarize_emissions`, reading whole months from the rollup."""
+    totals: Dict[str, float] = {"1": 0.0, "2": 0.0, "3": 0.0} if group_by == "scope" else {}
+    edges = _summary_stmt(org_id, period_start, period_end, group_by=group_by, region=region)
+
+    months = full_months(period_start, period_end)
+    if months:
+        first, last = months
+        # every activity starting inside a full month overlaps the range
+        edges = edges.where(or_(Activity.period_start < first, Activity.period_start > _month_end(last)))
+        col = EmissionRollup.scope if group_by == "scope" else EmissionRollup.category
+        ranked = _ranked_factors(region=region)
+        body = (
+            select(col, func.sum(EmissionRollup.quantity * ranked.c.factor_value))
+            .join(
+                ranked,
+                and_(
+                    ranked.c.category == EmissionRollup.category,
+                    ranked.c.input_unit == EmissionRollup.unit,
+                    ranked.c.rn == 1,
+                ),
+            )
+            .where(EmissionRollup.org_id == org_id, EmissionRollup.month.between(first, last))
+            .group_by(col)
+        )
+        for k, total in db.execute(body):
+            totals[str(k)] = totals.get(str(k), 0.0) + float(total or 0.0)
+
+    for k, total in db.execute(edges):
+        totals[str(k)] = totals.get(str(k), 0.0) + float(total or 0.0)
+    return totals
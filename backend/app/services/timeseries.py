@@ -0,0 +1,102 @@
+# backend/app/services/timeseries.py
+"""Bucketed emissions over time in a single pass over activities.
+
+Each activity's co2e is spread across buckets in proportion to the number of
+its days (period_start..period_end, inclusive) that fall in each bucket. Days
+outside the requested range are not counted.
+"""
+from __future__ import annotations
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Activity
+from app.services.calc import _in_period
+from app.services.factors import factor_index
+
+BUCKETS = ("day", "week", "month", "quarter")
+MAX_BUCKETS = 5000
+
+
+def bucket_floor(d: date, bucket: str) -> date:
+    if bucket == "day":
+        return d
+    if bucket == "week":
+        return d - timedelta(days=d.weekday())  # ISO weeks start on Monday
+    if bucket == "month":
+        return d.replace(day=1)
+    if bucket == "quarter":
+        return date(d.year, 3 * ((d.month - 1) // 3) + 1, 1)
+    raise ValueError(f"Unknown bucket: {bucket}")
+
+
+def _next_bucket(d: date, bucket: str) -> date:
+    if bucket == "day":
+        return d + timedelta(days=1)
+    if bucket == "week":
+        return d + timedelta(days=7)
+    months = 1 if bucket == "month" else 3
+    m = d.month - 1 + months
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def bucket_starts(period_start: date, period_end: date, bucket: str) -> List[date]:
+    starts = [bucket_floor(period_start, bucket)]
+    while True:
+        nxt = _next_bucket(starts[-1], bucket)
+        if nxt > period_end:
+            return starts
+        if len(starts) >= MAX_BUCKETS:
+            raise ValueError(f"Range spans more than {MAX_BUCKETS} {bucket} buckets")
+        starts.append(nxt)
+
+
+def emissions_timeseries(
+    db: Session,
+    org_id: int,
+    period_start: date,
+    period_end: date,
+    bucket: str = "month",
+    group_by: str = "scope",
+    region: Optional[str] = "US",
+) -> List[Dict]:
+    """One point per bucket: {"start", "end", "total", "values": {group: kgCO2e}}.
+
+    Bucket start/end are clipped to the requested range.
+    """
+    starts = bucket_starts(period_start, period_end, bucket)
+    # inclusive last day of each bucket, clipped to the range
+    ends = [s - timedelta(days=1) for s in starts[1:]] + [period_end]
+    clipped_starts = [max(starts[0], period_start)] + starts[1:]
+    labels = ["1", "2", "3"] if group_by == "scope" else []
+    values: List[Dict[str, float]] = [{k: 0.0 for k in labels} for _ in starts]
+
+    rows = db.execute(
+        select(
+            Activity.scope, Activity.category, Activity.unit, Activity.quantity,
+            Activity.period_start, Activity.period_end,
+        ).where(_in_period(org_id, period_start, period_end))
+    ).all()
+    factors = factor_index.pick_many(db, {(r.category, r.unit) for r in rows}, region=region)
+
+    for r in rows:
+        factor = factors.get((r.category, r.unit))
+        if not factor:
+            continue
+        co2e_per_day = float(r.quantity) * float(factor.factor_value) / ((r.period_end - r.period_start).days + 1)
+        key = str(r.scope) if group_by == "scope" else r.category
+        lo, hi = max(r.period_start, period_start), min(r.period_end, period_end)
+        i = bisect_right(starts, lo) - 1
+        while i < len(starts) and clipped_starts[i] <= hi:
+            days = (min(hi, ends[i]) - max(lo, clipped_starts[i])).days + 1
+            bucket_values = values[i]
+            bucket_values[key] = bucket_values.get(key, 0.0) + co2e_per_day * days
+            i += 1
+
+    return [
+        {"start": s, "end": e, "total": sum(v.values()), "values": v}
+        for s, e, v in zip(clipped_starts, ends, values)
+    ]
@@ -0,0 +1,58 @@
+# backend/app/services/versions.py
+"""Per-org data versions.
+
+Every write that can change a calculation bumps a counter in the same
+transaction: the org's counter for activity inserts, the shared "factors"
+counter for factor changes. An org's data version is the pair of the two, so
+anything cached under it is stale exactly when the counters move.
+"""
+from __future__ import annotations
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models import DataVersion
+
+FACTORS_KEY = "factors"
+
+
+def org_key(org_id: int) -> str:
+    return f"org:{org_id}"
+
+
+def _bump(db: Session, keys: Iterable[str]) -> None:
+    keys = sorted(set(keys))  # stable order avoids lock-order deadlocks
+    if not keys:
+        return
+    insert = dialect_insert(db)
+    stmt = insert(DataVersion).values([{"key": k, "version": 1} for k in keys])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DataVersion.key],
+        set_={"version": DataVersion.version + 1},
+    )
+    db.execute(stmt)
+
+
+def bump_orgs(db: Session, org_ids: Iterable[int]) -> None:
+    _bump(db, (org_key(o) for o in org_ids if o is not None))
+
+
+def bump_factors(db: Session) -> None:
+    _bump(db, [FACTORS_KEY])
+
+
+def data_version(db: Session, org_id: int) -> str:
+    """Opaque version of everything an org's calculation depends on."""
+    rows = dict(
+        db.execute(
+            select(DataVersion.key, DataVersion.version).where(DataVersion.key.in_([org_key(org_id), FACTORS_KEY]))
+        ).all()
+    )
+    return f"{rows.get(org_key(org_id), 0)}.{rows.get(FACTORS_KEY, 0)}"
+
+
+def factors_version(db: Session) -> str:
+    version = db.execute(select(DataVersion.version).where(DataVersion.key == FACTORS_KEY)).scalar()
+    return str(version or 0)
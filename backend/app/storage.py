@@ -0,0 +1,72 @@
+"""Object storage for uploaded files and exports.
+
+`s3` talks to MinIO (or any S3 API) using the minio_* settings; `local` keeps
+objects under settings.local_storage_dir and is what tests use. Objects are
+addressed by URI (s3://bucket/key or file:///path) so a Source row can be
+opened by any process that shares the storage.
+"""
+from __future__ import annotations
+import os
+import shutil
+from functools import lru_cache
+from typing import BinaryIO
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+
+class LocalStorage:
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+
+    def _inside(self, path: str) -> str:
+        path = os.path.realpath(path)
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"Storage path escapes {self.root}: {path}")
+        return path
+
+    def save(self, key: str, fileobj: BinaryIO) -> str:
+        path = self._inside(os.path.join(self.root, key))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, 1024 * 1024)
+        return "file://" + path
+
+    def open(self, uri: str) -> BinaryIO:
+        return open(self._inside(urlparse(uri).path), "rb")
+
+
+class S3Storage:
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str):
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+        )
+
+    def save(self, key: str, fileobj: BinaryIO) -> str:
+        # multipart upload; never buffers the whole file
+        self.client.upload_fileobj(fileobj, self.bucket, key)
+        return f"s3://{self.bucket}/{key}"
+
+    def open(self, uri: str) -> BinaryIO:
+        u = urlparse(uri)
+        return self.client.get_object(Bucket=u.netloc, Key=u.path.lstrip("/"))["Body"]
+
+
+@lru_cache
+def get_storage():
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.local_storage_dir)
+    if settings.storage_backend == "s3":
+        return S3Storage(
+            settings.minio_endpoint,
+            settings.minio_bucket,
+            settings.minio_access_key,
+            settings.minio_secret_key,
+        )
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {settings.storage_backend}")
@@ -0,0 +1,21 @@
+# backend/app/utils/pagination.py
+"""Opaque keyset cursors for (period_start, id) ordered listings."""
+import base64
+import json
+from datetime import date
+from typing import Tuple
+
+
+def encode_cursor(period_start: date, id: int) -> str:
+    raw = json.dumps([period_start.isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[date, int]:
+    """Inverse of `encode_cursor`; raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        start, id = json.loads(raw)
+        return date.fromisoformat(start), int(id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid cursor: {e}") from None
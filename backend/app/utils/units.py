@@ -1,9 +1,23 @@
 # backend/app/utils/units.py
-from typing import Tuple
-from pint import UnitRegistry
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple, Union
 
-ureg = UnitRegistry(autoconvert_offset_to_baseunit=True)
-Q_ = ureg.Quantity
+
+@lru_cache(maxsize=None)
+def get_ureg():
+    """The pint registry, built on first use (it takes a while to parse its definitions)."""
+    from pint import UnitRegistry
+
+    return UnitRegistry(autoconvert_offset_to_baseunit=True)
+
+def Q_(*args, **kwargs):
+    return get_ureg().Quantity(*args, **kwargs)
+
+def __getattr__(name: str):
+    # keep `units.ureg` working without building the registry at import
+    if name == "ureg":
+        return get_ureg()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Canonical units per category
 CANONICAL = {
@@ -37,28 +51,90 @@ def normalize_unit_str(unit: str) -> str:
     key = u.lower()
     return ALIASES.get(key, u)
 
-def convert_to_canonical(category: str, unit: str, quantity: float) -> Tuple[str, float, str]:
-    """
-    Returns (canonical_unit, canonical_quantity, note)
-    Note describes the conversion done, useful to stash in Activity.notes
-    """
+# (normalized input unit, canonical unit) -> multiplicative factor, None for
+# conversions that aren't a plain multiply (offset units), or the pint error text
+_CONVERSIONS: Dict[Tuple[str, str], Union[float, None, str]] = {}
+_MAX_CONVERSIONS = 4096  # unit strings are user input; don't grow without bound
+
+def _conversion(u_in: str, can: str) -> Union[float, None, str]:
+    key = (u_in, can)
+    if key in _CONVERSIONS:
+        return _CONVERSIONS[key]
+    try:
+        if Q_(0.0, u_in).to(can).magnitude != 0.0:
+            conv = None
+        else:
+            # pint converts as value * factor, so caching the factor is exact
+            conv = float(Q_(1.0, u_in).to(can).magnitude)
+    except Exception as e:
+        conv = str(e)
+    if len(_CONVERSIONS) < _MAX_CONVERSIONS:
+        _CONVERSIONS[key] = conv
+    return conv
+
+def _note(quantity, u_in: str, converted: float, can: str) -> str:
+    return f"normalized {quantity} {u_in} → {converted:.6g} {can}"
+
+def _passthrough(category: str, unit: str) -> Tuple[str, str, Optional[str]]:
+    """(canonical unit, normalized input unit, passthrough unit or None)."""
     can = canonical_unit_for(category)
     u_in = normalize_unit_str(unit)
     if can == "unit" or u_in == can:
-        return can, float(quantity), ""
+        return can, u_in, can
 
     # special composites not native to pint
     if can == "ton_km":
         # expect inputs like ("ton_km"), ("t*km"), or ("kg","km") not supported here
         # If user posted "ton_km" already, pass through
         if u_in in ("ton_km", "t*km", "tkm"):
-            return "ton_km", float(quantity), ""
+            return can, u_in, "ton_km"
         raise ValueError(f"Unsupported composite unit conversion to {can}")
+    return can, u_in, None
+
+def convert_to_canonical(category: str, unit: str, quantity: float) -> Tuple[str, float, str]:
+    """
+    Returns (canonical_unit, canonical_quantity, note)
+    Note describes the conversion done, useful to stash in Activity.notes
+    """
+    can, u_in, passthrough = _passthrough(category, unit)
+    if passthrough:
+        return passthrough, float(quantity), ""
+
+    conv = _conversion(u_in, can)
+    if isinstance(conv, float):
+        converted = quantity * conv
+        return can, float(converted), _note(quantity, u_in, converted, can)
+    if isinstance(conv, str):
+        raise ValueError(f"Cannot convert {quantity} {u_in} to {can}: {conv}")
 
     try:
         q = Q_(quantity, u_in)
         q_can = q.to(can)
-        note = f"normalized {quantity} {u_in} → {q_can.magnitude:.6g} {can}"
+        note = _note(quantity, u_in, q_can.magnitude, can)
         return can, float(q_can.magnitude), note
     except Exception as e:
         raise ValueError(f"Cannot convert {quantity} {u_in} to {can}: {e}")
+
+def convert_many(category: str, unit: str, quantities: Sequence[float]):
+    """Vectorized `convert_to_canonical` for quantities sharing one unit.
+
+    Returns (canonical_unit, float64 array of converted quantities, notes);
+    values and notes match per-row `convert_to_canonical` calls exactly.
+    """
+    import numpy as np
+
+    can, u_in, passthrough = _passthrough(category, unit)
+    values = np.asarray(quantities, dtype=np.float64)
+    if passthrough:
+        return passthrough, values, [""] * len(values)
+
+    conv = _conversion(u_in, can)
+    if isinstance(conv, float):
+        converted = values * conv
+        notes = [_note(q, u_in, c, can) for q, c in zip(quantities, converted.tolist())]
+        return can, converted, notes
+    if isinstance(conv, str):
+        raise ValueError(f"Cannot convert {u_in} to {can}: {conv}")
+
+    rows = [convert_to_canonical(category, unit, q) for q in quantities]
+    return can, np.array([r[1] for r in rows], dtype=np.float64), [r[2] for r in rows]
@@ -0,0 +1,208 @@
+"""Benchmark suite: calculation engines, unit conversion and API endpoints.
+
+Seeds a throwaway database with `bench.synth` (SQLite by default, or any
+DATABASE_URL you pass with --db), then times each case and reports the median
+in milliseconds. The API cases go through the real FastAPI app over an
+in-process ASGI transport, so routing, validation and serialization are
+included but no network is. Run from backend/:
+
+    python -m bench.run --sizes 1000,10000,100000 --out bench-results.json
+    python -m bench.run --thresholds bench/thresholds.json --baseline old.json --max-regression 1.25
+
+Results carry the git commit they were measured on. The run exits non-zero
+when a median exceeds its entry in the thresholds file, or is more than
+--max-regression times its median in --baseline.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Sequence
+
+from bench import synth
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERIOD = (synth.START, synth.START + timedelta(days=synth.DAYS))
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    fn()  # warm-up: imports, factor index, connection pool
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "runs": repeat,
+    }
+
+
+def calc_cases(orgs: Dict[int, int]):
+    from app.db import SessionLocal
+    from app.services import rollup
+    from app.services.calc import run_calculation, summarize_emissions
+
+    def calc(org_id, engine):
+        def run():
+            with SessionLocal() as db:
+                run_calculation(db, org_id, *PERIOD, region="US", engine=engine)
+        return run
+
+    def summary(org_id, fn):
+        def run():
+            with SessionLocal() as db:
+                fn(db=db, org_id=org_id, period_start=PERIOD[0], period_end=PERIOD[1], group_by="scope", region="US")
+        return run
+
+    for org_id, n in orgs.items():
+        yield f"calc.python:{n}", calc(org_id, "python")
+        yield f"calc.numpy:{n}", calc(org_id, "numpy")
+        yield f"calc.stored:{n}", calc(org_id, "stored")
+        yield f"summary.sql:{n}", summary(org_id, summarize_emissions)
+        yield f"summary.rollup:{n}", summary(org_id, rollup.summarize_from_rollup)
+
+
+def unit_cases(n: int = 100_000):
+    from app.utils.units import convert_many, convert_to_canonical
+
+    rnd = random.Random(0)
+    pairs = [
+        ("electricity", "kWh"), ("electricity", "MWh"), ("diesel", "gal"), ("diesel", "L"),
+        ("gasoline", "gallon"), ("natural_gas", "therm"), ("distance", "mi"), ("spend", "usd"),
+    ]
+    rows = [(*rnd.choice(pairs), rnd.uniform(1, 1000)) for _ in range(n)]
+    quantities = [q for _, _, q in rows]
+
+    def per_row():
+        for category, unit, q in rows:
+            convert_to_canonical(category, unit, q)
+
+    def vectorized():
+        for category, unit in pairs:
+            convert_many(category, unit, quantities[: n // len(pairs)])
+
+    yield f"units.convert_to_canonical:{n}", per_row
+    yield f"units.convert_many:{n}", vectorized
+
+
+def api_cases(orgs: Dict[int, int]):
+    import httpx
+
+    from app.main import app
+    from app.services.result_cache import result_cache
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    span = {"period_start": PERIOD[0].isoformat(), "period_end": PERIOD[1].isoformat()}
+
+    def get(path, params, cached=False):
+        def run():
+            if not cached:
+                result_cache.clear()
+            r = loop.run_until_complete(client.get(path, params=params))
+            r.raise_for_status()
+        return run
+
+    yield "api.factors", get("/factors", {})
+    for org_id, n in orgs.items():
+        yield f"api.activities:{n}", get("/activities", {"org_id": org_id, "limit": 100})
+        yield f"api.calculate_run:{n}", get("/calculate/run", {"org_id": org_id, **span})
+        yield f"api.summary:{n}", get("/emissions/summary", {"org_id": org_id, **span})
+        yield f"api.summary.cached:{n}", get("/emissions/summary", {"org_id": org_id, **span}, cached=True)
+        yield f"api.timeseries:{n}", get(
+            "/emissions/timeseries", {"org_id": org_id, **span, "bucket": "month"}
+        )
+
+
+def _check(results: Dict[str, Dict], thresholds: Dict[str, float], baseline: Dict[str, Dict], max_regression):
+    failed = []
+    for name, r in results.items():
+        for pattern, limit in thresholds.items():
+            if fnmatch.fnmatchcase(name, pattern) and r["median_ms"] > limit:
+                failed.append(f"{name}: {r['median_ms']}ms > threshold {limit}ms ({pattern})")
+        old = baseline.get(name)
+        if max_regression and old and r["median_ms"] > old["median_ms"] * max_regression:
+            failed.append(f"{name}: {r['median_ms']}ms > {max_regression}x baseline {old['median_ms']}ms")
+    return failed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=None, help="database to seed (default: a temporary SQLite file)")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="activities per org, comma separated")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", default="*", help="glob over case names, e.g. 'calc.*'")
+    ap.add_argument("--out", default=None, help="write the JSON results here as well as stdout")
+    ap.add_argument("--thresholds", default=None, help="JSON {case glob: max median ms}")
+    ap.add_argument("--baseline", default=None, help="results JSON from an earlier commit")
+    ap.add_argument("--max-regression", type=float, default=None)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.db or f"sqlite:///{tmp.name}/bench.db"
+    os.environ.setdefault("STORAGE_BACKEND", "local")
+
+    log = lambda msg: print(msg, file=sys.stderr)
+    orgs = synth.generate(synth.parse_sizes(args.sizes), seed=args.seed, log=log)
+
+    results: Dict[str, Dict] = {}
+    for cases in (calc_cases(orgs), unit_cases(), api_cases(orgs)):
+        for name, fn in cases:
+            if fnmatch.fnmatchcase(name, args.only):
+                results[name] = _timed(fn, args.repeat)
+                log(f"{name}: {results[name]['median_ms']}ms")
+
+    report = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "sizes": list(orgs.values()),
+        "seed": args.seed,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+    thresholds = {}
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    failed = _check(results, thresholds, baseline, args.max_regression)
+    for f in failed:
+        print(f"FAIL: {f}", file=sys.stderr)
+    tmp.cleanup()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Cold-start benchmark: `import app.main` and time-to-first-request.
+
+Each sample runs in a fresh interpreter so module caches don't hide import
+cost. Run from backend/:
+
+    python -m bench.startup --runs 5 --max-import-ms 2500 --max-first-request-ms 4000
+
+Exits non-zero when a median exceeds its threshold. Importing the app must not
+need a database, so the import probe runs with DATABASE_URL unset; the first
+request probe hits /health on a throwaway SQLite file.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import time
+t = time.perf_counter()
+import app.main
+print(time.perf_counter() - t)
+"""
+
+FIRST_REQUEST_PROBE = """
+import time
+t = time.perf_counter()
+from fastapi.testclient import TestClient
+import app.main
+with TestClient(app.main.app) as client:
+    assert client.get("/health").status_code == 200
+print(time.perf_counter() - t)
+"""
+
+
+def _probe(code: str, env: dict) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure(runs: int) -> dict:
+    base_env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    no_db = {k: v for k, v in base_env.items() if k != "DATABASE_URL"}
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_env = {**base_env, "DATABASE_URL": f"sqlite:///{tmp}/startup.db"}
+        imports = [_probe(IMPORT_PROBE, no_db) for _ in range(runs)]
+        firsts = [_probe(FIRST_REQUEST_PROBE, sqlite_env) for _ in range(runs)]
+    return {
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "first_request_ms": round(statistics.median(firsts) * 1000, 1),
+        "runs": runs,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--max-import-ms", type=float, default=None)
+    ap.add_argument("--max-first-request-ms", type=float, default=None)
+    args = ap.parse_args(argv)
+
+    result = measure(args.runs)
+    print(json.dumps(result))
+    failed = []
+    if args.max_import_ms is not None and result["import_ms"] > args.max_import_ms:
+        failed.append(f"import {result['import_ms']}ms > {args.max_import_ms}ms")
+    if args.max_first_request_ms is not None and result["first_request_ms"] > args.max_first_request_ms:
+        failed.append(f"first request {result['first_request_ms']}ms > {args.max_first_request_ms}ms")
+    for f in failed:
+        print(f"FAIL: {f}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
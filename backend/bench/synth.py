@@ -0,0 +1,154 @@
+"""Seeded synthetic data for benchmarks.
+
+Builds a factor table covering every `CANONICAL` category across a few
+datasets, regions and years, and orgs with the requested activity counts
+spread over those categories. The same `--seed` always produces the same
+rows, so timings from different commits are measured on identical data.
+Activities go through `insert_batch`, keeping the monthly rollup and data
+versions consistent with what the API would have written.
+
+    python -m bench.synth --db sqlite:////tmp/bench.db --sizes 1000,100000,1000000
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+DATASETS = {
+    # dataset -> regions it publishes (None = global default)
+    "EPA": ["US", None],
+    "DEFRA": ["UK"],
+    "IEA": ["US", "UK", "CA", None],
+}
+YEARS = [2019, 2020, 2021, 2022, 2023, 2024, None]
+FACTOR_BASE = {
+    "electricity": 0.4,
+    "diesel": 2.68,
+    "gasoline": 2.31,
+    "natural_gas": 5.31,
+    "distance": 0.17,
+    "freight_distance": 0.11,
+    "refrigerant": 1430.0,
+    "spend": 0.35,
+}
+SCOPES = {
+    "electricity": "2",
+    "diesel": "1",
+    "gasoline": "1",
+    "natural_gas": "1",
+    "distance": "3",
+    "freight_distance": "3",
+    "refrigerant": "1",
+    "spend": "3",
+}
+START = date(2021, 1, 1)
+DAYS = 3 * 365
+BATCH = 10_000
+
+
+def factor_rows(rnd: random.Random) -> List[Dict]:
+    from app.utils.units import CANONICAL
+
+    rows = []
+    for dataset, regions in DATASETS.items():
+        for region in regions:
+            for category, unit in CANONICAL.items():
+                for year in YEARS:
+                    rows.append({
+                        "dataset": dataset,
+                        "region": region,
+                        "category": category,
+                        "input_unit": unit,
+                        "factor_value": FACTOR_BASE[category] * rnd.uniform(0.8, 1.2),
+                        "year": year,
+                        "version": f"{dataset}-{year or 'na'}",
+                    })
+    return rows
+
+
+def activity_rows(rnd: random.Random, org_id: int, n: int):
+    from app.utils.units import CANONICAL
+
+    categories = list(CANONICAL.items())
+    weights = [8, 3, 3, 4, 2, 1, 1, 5][: len(categories)]
+    for _ in range(n):
+        category, unit = rnd.choices(categories, weights)[0]
+        start = START + timedelta(days=rnd.randrange(DAYS))
+        yield {
+            "org_id": org_id,
+            "scope": SCOPES.get(category, rnd.choice("123")),
+            "category": category,
+            "unit": unit,
+            "quantity": rnd.lognormvariate(5, 1.5),
+            "period_start": start,
+            "period_end": start + timedelta(days=rnd.choice((0, 6, 29, 30, 90))),
+            "source_id": None,
+            "notes": None,
+            "data_quality": None,
+        }
+
+
+def generate(sizes: Sequence[int], seed: int = 0, reset: bool = True, log=print) -> Dict[int, int]:
+    """Create one org per entry of `sizes` (org ids 1..n); returns {org_id: rows}."""
+    from sqlalchemy import insert
+
+    from app.db import Base, SessionLocal, get_engine
+    from app.models import EmissionFactor
+    from app.services.factors import factor_index, mark_factors_changed
+    from app.services.ingest import IngestReport, insert_batch
+    from app.services.versions import bump_factors
+
+    engine = get_engine()
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rnd = random.Random(seed)
+    orgs: Dict[int, int] = {}
+    db = SessionLocal()
+    try:
+        db.execute(insert(EmissionFactor), factor_rows(rnd))
+        mark_factors_changed(db)
+        bump_factors(db)
+        db.commit()
+        for org_id, n in enumerate(sizes, start=1):
+            t = time.perf_counter()
+            report = IngestReport()
+            batch = []
+            for row in activity_rows(rnd, org_id, n):
+                batch.append(row)
+                if len(batch) >= BATCH:
+                    insert_batch(db, batch, report)
+                    batch = []
+            if batch:
+                insert_batch(db, batch, report)
+            db.commit()
+            orgs[org_id] = report.inserted
+            log(f"org {org_id}: {report.inserted} activities in {time.perf_counter() - t:.1f}s")
+    finally:
+        db.close()
+    factor_index.invalidate()
+    return orgs
+
+
+def parse_sizes(text: str) -> List[int]:
+    return [int(float(s)) for s in text.split(",") if s.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=os.getenv("DATABASE_URL") or "sqlite:////tmp/carbon-bench.db")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="activities per org, comma separated")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    os.environ["DATABASE_URL"] = args.db
+    generate(parse_sizes(args.sizes), seed=args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+"""add monthly emission_rollups
+
+Revision ID: 3fa8d0c6b7e4
+Revises: e7b3c5a90f12
+Create Date: 2025-09-12 16:03:27.552910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3fa8d0c6b7e4'
+down_revision: Union[str, None] = 'e7b3c5a90f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('emission_rollups',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('unit', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('activity_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('org_id', 'month', 'scope', 'category', 'unit')
+    )
+    # backfill from existing activities
+    op.execute("""
+        INSERT INTO emission_rollups (org_id, month, scope, category, unit, quantity, activity_count)
+        SELECT org_id, date_trunc('month', period_start)::date, scope::text, category, unit,
+               sum(quantity), count(*)
+        FROM activities
+        WHERE org_id IS NOT NULL
+        GROUP BY org_id, date_trunc('month', period_start)::date, scope, category, unit
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('emission_rollups')
@@ -0,0 +1,54 @@
+"""persist selected factor and co2e_kg per activity
+
+Revision ID: 5e9a7c3b1d20
+Revises: 8c1d2e3f4a5b
+Create Date: 2025-09-22 14:17:53.204961
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a7c3b1d20'
+down_revision: Union[str, None] = '8c1d2e3f4a5b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# settings.default_region at the time of the migration; for another region run
+# `python -m app.scripts.emissions recompute` afterwards
+DEFAULT_REGION = 'US'
+
+
+def upgrade() -> None:
+    op.add_column('activities', sa.Column('factor_id', sa.Integer(), nullable=True))
+    op.add_column('activities', sa.Column('co2e_kg', sa.Float(), nullable=True))
+    op.create_foreign_key(
+        'activities_factor_id_fkey', 'activities', 'emission_factors',
+        ['factor_id'], ['id'], ondelete='SET NULL',
+    )
+    op.create_index('ix_activities_category_unit', 'activities', ['category', 'unit'], unique=False)
+    # backfill with the same selection the calculation makes
+    op.execute(sa.text("""
+        UPDATE activities a
+        SET factor_id = f.id, co2e_kg = a.quantity * f.factor_value
+        FROM (
+            SELECT id, category, input_unit, factor_value,
+                   row_number() OVER (
+                       PARTITION BY category, input_unit
+                       ORDER BY year DESC NULLS LAST, id DESC
+                   ) AS rn
+            FROM emission_factors
+            WHERE region = :region OR region IS NULL
+        ) f
+        WHERE f.rn = 1 AND f.category = a.category AND f.input_unit = a.unit
+    """).bindparams(region=DEFAULT_REGION))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activities_category_unit', table_name='activities')
+    op.drop_constraint('activities_factor_id_fkey', 'activities', type_='foreignkey')
+    op.drop_column('activities', 'co2e_kg')
+    op.drop_column('activities', 'factor_id')
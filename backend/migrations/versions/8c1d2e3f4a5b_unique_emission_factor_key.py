@@ -0,0 +1,42 @@
+"""unique key on emission_factors (dataset, region, category, input_unit, year)
+
+Revision ID: 8c1d2e3f4a5b
+Revises: 3fa8d0c6b7e4
+Create Date: 2025-09-18 10:42:08.613377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d2e3f4a5b'
+down_revision: Union[str, None] = '3fa8d0c6b7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep the newest row of any duplicated key; it is the one lookups picked anyway
+    op.execute("""
+        DELETE FROM emission_factors f
+        USING emission_factors newer
+        WHERE newer.id > f.id
+          AND newer.dataset = f.dataset
+          AND newer.region IS NOT DISTINCT FROM f.region
+          AND newer.category = f.category
+          AND newer.input_unit = f.input_unit
+          AND newer.year IS NOT DISTINCT FROM f.year
+    """)
+    op.create_index(
+        'uq_emission_factors_key', 'emission_factors',
+        ['dataset', 'region', 'category', 'input_unit', 'year'],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_emission_factors_key', table_name='emission_factors')
@@ -0,0 +1,32 @@
+"""add source ingestion progress
+
+Revision ID: 9c2f41d7e8a5
+Revises: 0b69cebd3171
+Create Date: 2025-09-04 10:12:08.311502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2f41d7e8a5'
+down_revision: Union[str, None] = '0b69cebd3171'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sources', sa.Column('rows_processed', sa.Integer(), nullable=True))
+    op.add_column('sources', sa.Column('rows_inserted', sa.Integer(), nullable=True))
+    op.add_column('sources', sa.Column('rows_failed', sa.Integer(), nullable=True))
+    op.add_column('sources', sa.Column('error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sources', 'error')
+    op.drop_column('sources', 'rows_failed')
+    op.drop_column('sources', 'rows_inserted')
+    op.drop_column('sources', 'rows_processed')
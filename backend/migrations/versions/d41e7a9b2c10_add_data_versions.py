@@ -0,0 +1,30 @@
+"""add data_versions
+
+Revision ID: d41e7a9b2c10
+Revises: 9c2f41d7e8a5
+Create Date: 2025-09-06 14:48:51.207334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41e7a9b2c10'
+down_revision: Union[str, None] = '9c2f41d7e8a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('data_versions',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('data_versions')
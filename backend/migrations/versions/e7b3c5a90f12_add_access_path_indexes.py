@@ -0,0 +1,50 @@
+"""add access path indexes for period overlap and factor lookup
+
+Revision ID: e7b3c5a90f12
+Revises: d41e7a9b2c10
+Create Date: 2025-09-09 09:21:40.118263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3c5a90f12'
+down_revision: Union[str, None] = 'd41e7a9b2c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, and keeps writes flowing on big tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_activities_org_period_start', 'activities',
+            ['org_id', sa.text('period_start DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_include=['period_end', 'scope', 'category', 'unit', 'quantity'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_activities_org_period_end', 'activities',
+            ['org_id', 'period_end'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_emission_factors_lookup', 'emission_factors',
+            ['category', 'input_unit', sa.text('year DESC NULLS LAST'), sa.text('id DESC')],
+            unique=False,
+            postgresql_include=['region', 'factor_value'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_emission_factors_lookup', table_name='emission_factors', postgresql_concurrently=True)
+        op.drop_index('ix_activities_org_period_end', table_name='activities', postgresql_concurrently=True)
+        op.drop_index('ix_activities_org_period_start', table_name='activities', postgresql_concurrently=True)
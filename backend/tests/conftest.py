@@ -0,0 +1,87 @@
+"""Shared fixtures: a throwaway database, fakeredis and an API client.
+
+Tests run against SQLite by default; set TEST_DATABASE_URL to run them (and
+the Postgres-only ones) against a real server. Every test starts from empty
+tables and cold in-process caches.
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="carbon-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_STORAGE_DIR", os.path.join(_tmp, "storage"))
+
+import fakeredis  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402,F401  (register tables on Base.metadata)
+from app.db import Base, SessionLocal, get_engine  # noqa: E402
+from app.deps import get_redis  # noqa: E402
+from app.services.factor_import import import_factor_rows  # noqa: E402
+from app.services.factors import factor_index  # noqa: E402
+from app.services.result_cache import result_cache  # noqa: E402
+
+FACTORS = [
+    # dataset, region, category, input_unit, factor_value, year, version
+    ("EPA", "US", "electricity", "kWh", 0.386, 2022, "EPA-2022"),
+    ("EPA", "US", "electricity", "kWh", 0.4, 2021, "EPA-2021"),
+    ("EPA", "CA", "electricity", "kWh", 0.1, 2024, "EPA-2024"),
+    ("EPA", "US", "diesel", "L", 2.68, 2022, "EPA-2022"),
+    ("EPA", None, "gasoline", "L", 2.31, None, "generic"),
+    ("DEFRA", "UK", "natural_gas", "therm", 5.0, 2022, "DEFRA-2022"),
+]
+FACTOR_FIELDS = ("dataset", "region", "category", "input_unit", "factor_value", "year", "version")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        models.SCOPE_ENUM.create(engine, checkfirst=True)  # created by migrations, not create_all
+    Base.metadata.create_all(bind=engine)
+    factor_index.invalidate()
+    result_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def factors(db):
+    import_factor_rows(db, (dict(zip(FACTOR_FIELDS, row)) for row in FACTORS))
+    return FACTORS
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def client(redis_client):
+    from app.main import app
+
+    app.dependency_overrides[get_redis] = lambda: redis_client
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+def activity(org_id=1, scope="1", category="electricity", unit="kWh", quantity=100.0,
+             period_start="2024-01-10", period_end="2024-01-20", **extra):
+    return {
+        "org_id": org_id, "scope": scope, "category": category, "unit": unit, "quantity": quantity,
+        "period_start": period_start, "period_end": period_end, **extra,
+    }
@@ -0,0 +1,39 @@
+from datetime import date
+
+import orjson
+import pytest
+
+from app import schemas
+from app.services.calc import LINE_ITEM_FIELDS, run_calculation, run_calculation_json
+from app.services.ingest import ingest_rows
+from tests.conftest import activity
+
+PERIOD = (date(2024, 1, 1), date(2024, 12, 31))
+
+
+@pytest.fixture
+def data(db, factors):
+    ingest_rows(db, [
+        activity(quantity=100), activity(scope="2", quantity=50),
+        activity(scope="3", category="diesel", unit="L", quantity=10),
+        activity(scope="3", category="natural_gas", unit="therm", quantity=1),  # no US factor
+    ])
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy", "stored"])
+def test_engines_agree(db, data, engine):
+    expected = run_calculation(db, 1, *PERIOD, engine="python")
+    assert run_calculation(db, 1, *PERIOD, engine=engine) == expected
+    assert len(expected[0]) == 3
+
+
+def test_json_matches_calculation_result_layout(db, data):
+    items, by_scope, by_category = run_calculation(db, 1, *PERIOD)
+    result = schemas.CalculationResult.model_validate_json(run_calculation_json(db, 1, *PERIOD))
+    assert result.total_kg == pytest.approx(100 * 0.386 + 50 * 0.386 + 10 * 2.68)
+    assert (result.by_scope, result.by_category) == (by_scope, by_category)
+    assert [i.activity_id for i in result.items] == [i.activity_id for i in items]
+
+    columns = orjson.loads(run_calculation_json(db, 1, *PERIOD, shape="columns"))["items"]
+    assert tuple(columns) == LINE_ITEM_FIELDS
+    assert columns["co2e_kg"] == [i.co2e_kg for i in result.items]
@@ -0,0 +1,117 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models import Activity
+from app.services import emissions
+from app.services.calc import run_calculation, summarize_emissions
+from app.services.factor_import import import_factor_rows
+from app.services.ingest import ingest_rows
+from app.services.versions import data_version
+from tests.conftest import activity
+
+PERIOD = (date(2024, 1, 1), date(2024, 12, 31))
+PARAMS = {"org_id": 1, "period_start": "2024-01-01", "period_end": "2024-12-31"}
+
+
+def _factor(category, unit, value, region="US", year=2022):
+    return {"dataset": "EPA", "region": region, "category": category, "input_unit": unit,
+            "factor_value": value, "year": year, "version": f"EPA-{year}"}
+
+
+@pytest.fixture
+def data(db, factors):
+    ingest_rows(db, [
+        activity(quantity=100),
+        activity(scope="2", quantity=50),
+        activity(category="diesel", unit="L", quantity=10),
+        activity(scope="3", category="natural_gas", unit="therm", quantity=4),  # no US factor yet
+        activity(org_id=2, category="diesel", unit="L", quantity=7),
+    ])
+
+
+def _stored(db):
+    return {r.id: (r.factor_id, r.co2e_kg) for r in db.execute(select(Activity.id, Activity.factor_id, Activity.co2e_kg))}
+
+
+def _assert_engines_agree(db):
+    for org_id in (1, 2):
+        _, stored, _ = run_calculation(db, org_id, *PERIOD, engine="stored")
+        _, python, _ = run_calculation(db, org_id, *PERIOD, engine="python")
+        assert stored == pytest.approx(python)
+        assert summarize_emissions(db, org_id, *PERIOD) == pytest.approx(python)
+
+
+def test_ingest_stamps_the_default_region_selection(db, data):
+    rows = {(r.category, r.quantity): (r.factor_id, r.co2e_kg) for r in db.scalars(select(Activity))}
+    assert rows[("electricity", 100)][1] == pytest.approx(100 * 0.386)
+    assert rows[("diesel", 10)][1] == pytest.approx(10 * 2.68)
+    assert rows[("natural_gas", 4)] == (None, None)
+    assert emissions.check(db)["mismatched"] == 0
+    _assert_engines_agree(db)
+
+
+def test_post_activity_is_stamped(client, factors, db):
+    r = client.post("/activities", json=activity(category="diesel", unit="L", quantity=3))
+    assert r.status_code == 200
+    row = db.get(Activity, r.json()["id"])
+    assert row.factor_id is not None and row.co2e_kg == pytest.approx(3 * 2.68)
+
+
+def test_factor_import_recomputes_in_its_transaction(db, data):
+    before = _stored(db)
+    version = data_version(db, 1)
+    report = import_factor_rows(db, [
+        _factor("diesel", "L", 3.0),              # replaces the selected diesel factor
+        _factor("natural_gas", "therm", 5.5),     # maps a selection that had none
+        _factor("electricity", "kWh", 0.2, region="CA", year=2025),  # not the default region
+    ])
+    # both diesel rows and the natural gas row
+    assert report.recomputed == 3
+    assert data_version(db, 1) != version
+    after = _stored(db)
+    changed = {i for i in after if after[i] != before[i]}
+    assert {db.get(Activity, i).category for i in changed} == {"diesel", "natural_gas"}
+    assert emissions.check(db)["mismatched"] == 0
+    _assert_engines_agree(db)
+
+
+def test_dry_run_rolls_back_the_recompute(db, data):
+    before = _stored(db)
+    report = import_factor_rows(db, [_factor("diesel", "L", 3.0)], dry_run=True)
+    assert report.recomputed == 2
+    assert _stored(db) == before
+
+
+def test_check_finds_and_recompute_fixes_drift(db, data):
+    db.execute(update(Activity).where(Activity.category == "diesel", Activity.org_id == 2).values(co2e_kg=1.0))
+    db.commit()
+    report = emissions.check(db)
+    assert report["mismatched"] == 1 and report["pairs"] == [["diesel", "L"]]
+    assert report["examples"][0]["stored"][1] == 1.0
+    assert emissions.check(db, org_id=1)["mismatched"] == 0
+
+    version = data_version(db, 2)
+    assert emissions.recompute(db, [("electricity", "kWh")]) == 0  # untouched pair
+    assert data_version(db, 2) == version
+    assert emissions.recompute(db) == 1
+    assert data_version(db, 2) != version
+    assert emissions.check(db)["mismatched"] == 0
+
+
+def test_default_endpoints_are_current_after_an_import(client, db, data):
+    def totals():
+        return {
+            "run": client.get("/calculate/run", params=PARAMS).json()["by_scope"],
+            "python": client.get("/calculate/run", params={**PARAMS, "engine": "python"}).json()["by_scope"],
+            "sql": client.get("/emissions/summary", params={**PARAMS, "mode": "sql"}).json(),
+            "rollup": client.get("/emissions/summary", params=PARAMS).json(),
+        }
+
+    totals()  # warm the result cache
+    import_factor_rows(db, [_factor("diesel", "L", 3.0), _factor("natural_gas", "therm", 5.5)])
+    got = totals()
+    assert got["python"] == pytest.approx({"1": 100 * 0.386 + 10 * 3.0, "2": 50 * 0.386, "3": 4 * 5.5})
+    for name in ("run", "sql", "rollup"):
+        assert got[name] == pytest.approx(got["python"]), name
@@ -0,0 +1,46 @@
+import io
+
+from sqlalchemy import func, select
+
+from app.models import EmissionFactor
+from app.services.factor_import import import_factor_rows, read_factor_rows
+
+JSONL = b"""{"dataset": "EPA", "region": "US", "category": "electricity", "input_unit": "kWh", "factor_value": 0.386, "year": 2022}
+{"dataset": "EPA", "region": "US", "category": "diesel", "input_unit": "L", "factor_value": 2.6
+[1, 2]
+
+{"dataset": "EPA", "region": "US", "category": "diesel", "input_unit": "L", "factor_value": 2.68, "year": 2022}
+{"dataset": "EPA", "category": "gasoline", "input_unit": "L"}
+"""
+
+
+def _count(db):
+    return db.scalar(select(func.count()).select_from(EmissionFactor))
+
+
+def test_malformed_lines_are_reported_and_skipped(db):
+    report = import_factor_rows(db, read_factor_rows(io.BytesIO(JSONL), "jsonl"), overrides={"version": "v1"})
+    assert (report.received, report.inserted) == (5, 2)
+    assert [e["index"] for e in report.errors] == [1, 2, 4]
+    assert report.errors[0]["errors"][0].startswith("line 2: invalid JSON")
+    assert report.errors[1]["errors"] == ["row: expected an object"]
+    assert _count(db) == 2
+
+
+def test_upsert_counts_and_dry_run(db):
+    rows = [
+        {"dataset": "EPA", "region": "US", "category": "electricity", "input_unit": "kWh", "factor_value": 0.4},
+        {"dataset": "EPA", "region": None, "category": "diesel", "input_unit": "L", "factor_value": 2.7, "year": 2022},
+    ]
+    first = import_factor_rows(db, rows)
+    assert (first.inserted, first.updated, first.unchanged) == (2, 0, 0)
+
+    changed = [{**rows[0], "factor_value": 0.39}, rows[1], rows[1]]
+    dry = import_factor_rows(db, changed, dry_run=True)
+    assert (dry.inserted, dry.updated, dry.unchanged, dry.duplicates) == (0, 1, 1, 1)
+    assert db.scalar(select(EmissionFactor.factor_value).where(EmissionFactor.category == "electricity")) == 0.4
+
+    again = import_factor_rows(db, changed)
+    assert (again.inserted, again.updated, again.unchanged) == (0, 1, 1)
+    assert db.scalar(select(EmissionFactor.factor_value).where(EmissionFactor.category == "electricity")) == 0.39
+    assert _count(db) == 2
@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+import time
+from datetime import date
+
+import orjson
+from sqlalchemy import update
+
+from app.models import EmissionFactor
+from app.services.calc import run_calculation_json
+from app.services.ingest import ingest_rows
+from app.services.jobs import CALC_QUEUE, CalcJobs
+from app.services.versions import bump_factors
+from tests.conftest import activity
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "worker"))
+import worker  # noqa: E402
+
+JOB = {"org_id": 1, "period_start": "2024-01-01", "period_end": "2024-12-31"}
+
+
+def _work_one(r):
+    """What the worker loop does with one CALC_QUEUE item."""
+    _, job_id = r.blpop([CALC_QUEUE], timeout=1)
+    worker.handle_calc(r, job_id.decode())
+
+
+def test_job_runs_in_worker_and_result_is_cached(client, redis_client, db, factors):
+    ingest_rows(db, [activity(quantity=100), activity(scope="3", category="diesel", unit="L", quantity=10)])
+
+    submitted = client.post("/calculate/jobs", params=JOB).json()
+    assert submitted["status"] == "queued"
+    assert redis_client.llen(CALC_QUEUE) == 1
+    assert client.get(f"/calculate/jobs/{submitted['job_id']}").json()["status"] == "queued"
+
+    _work_one(redis_client)
+    job = client.get(f"/calculate/jobs/{submitted['job_id']}").json()
+    assert job["status"] == "done"
+    expected = orjson.loads(run_calculation_json(db, 1, date(2024, 1, 1), date(2024, 12, 31)))
+    assert job["result"]["total_kg"] == expected["total_kg"] == 100 * 0.386 + 10 * 2.68
+    assert job["result"]["items"] == expected["items"]
+
+    # same org, period and data version: answered from the result, nothing queued
+    again = client.post("/calculate/jobs", params=JOB).json()
+    assert again["status"] == "done"
+    assert redis_client.llen(CALC_QUEUE) == 0
+
+    # new data moves the version, so the cached result no longer applies
+    ingest_rows(db, [activity(quantity=1)])
+    assert client.post("/calculate/jobs", params=JOB).json()["status"] == "queued"
+
+
+def test_job_uses_factors_changed_by_another_process(client, redis_client, db, factors):
+    ingest_rows(db, [activity(quantity=100)])
+    params = {**JOB, "region": "CA"}
+    client.post("/calculate/jobs", params=params)
+    _work_one(redis_client)  # loads the factor index in this (worker) process
+
+    # as another process would: no commit hook clears this process's index
+    db.execute(update(EmissionFactor).where(EmissionFactor.region == "CA").values(factor_value=0.2))
+    bump_factors(db)
+    db.commit()
+    job_id = client.post("/calculate/jobs", params=params).json()["job_id"]
+    _work_one(redis_client)
+    assert client.get(f"/calculate/jobs/{job_id}").json()["result"]["total_kg"] == 100 * 0.2
+
+
+def test_long_poll_returns_when_worker_finishes(client, redis_client, db, factors):
+    ingest_rows(db, [activity()])
+    job_id = client.post("/calculate/jobs", params=JOB).json()["job_id"]
+
+    runner = threading.Timer(0.3, _work_one, args=(redis_client,))
+    runner.start()
+    started = time.monotonic()
+    job = client.get(f"/calculate/jobs/{job_id}", params={"wait": 10}).json()
+    runner.join()
+    assert job["status"] == "done"
+    assert time.monotonic() - started < 5
+
+
+def test_long_poll_times_out_while_queued(client, factors):
+    job_id = client.post("/calculate/jobs", params=JOB).json()["job_id"]
+    started = time.monotonic()
+    assert client.get(f"/calculate/jobs/{job_id}", params={"wait": 0.5}).json()["status"] == "queued"
+    assert time.monotonic() - started >= 0.5
+
+
+def test_failed_job_records_error(redis_client, db):
+    jobs = CalcJobs(redis_client)
+    job_id = jobs.submit(db, 1, date(2024, 1, 1), date(2024, 2, 1))["job_id"]
+    redis_client.hset(f"calc:job:{job_id}", "period_start", "not-a-date")
+    _work_one(redis_client)
+    job = jobs.get(job_id)
+    assert job["status"] == "failed"
+    assert "not-a-date" in job["error"]
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/calculate/jobs/nope").status_code == 404
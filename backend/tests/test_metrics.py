@@ -0,0 +1,36 @@
+from prometheus_client import REGISTRY
+
+from app.services.ingest import ingest_rows
+from tests.conftest import activity
+
+PERIOD = {"org_id": 1, "period_start": "2024-01-01", "period_end": "2024-12-31"}
+
+
+def _observed(route):
+    labels = {"route": route}
+    return (
+        REGISTRY.get_sample_value("http_request_db_queries_count", labels) or 0,
+        REGISTRY.get_sample_value("http_request_db_queries_sum", labels) or 0,
+    )
+
+
+def test_query_headers_on_complete_bodies(client, db, factors):
+    ingest_rows(db, [activity()])
+    r = client.get("/emissions/summary", params={**PERIOD, "mode": "python"}, headers={"X-Query-Count": "1"})
+    assert int(r.headers["X-Query-Count"]) >= 2  # data version + the calculation
+    assert "X-Query-Time-Ms" in r.headers
+    assert "X-Query-Count" not in client.get("/health").headers
+
+
+def test_streamed_bodies_are_measured_to_the_end(client, db, factors):
+    ingest_rows(db, [activity(quantity=q) for q in range(1, 6)])
+    before_count, before_sum = _observed("/calculate/run")
+    r = client.get("/calculate/run", params={**PERIOD, "format": "ndjson"}, headers={"X-Query-Count": "1"})
+    assert r.status_code == 200
+    assert len(r.text.splitlines()) == 6  # five items and the totals line
+    # the stream's headers go out before its queries run, so no header...
+    assert "X-Query-Count" not in r.headers
+    # ...but the histogram sees the queries the body ran
+    after_count, after_sum = _observed("/calculate/run")
+    assert after_count == before_count + 1
+    assert after_sum - before_sum >= 1
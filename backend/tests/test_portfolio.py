@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+from app.core.config import settings
+from app.services import portfolio
+from app.services.factor_import import import_factor_rows
+from app.services.ingest import ingest_rows
+from tests.conftest import activity
+
+PERIOD = (date(2024, 1, 1), date(2024, 12, 31))
+
+
+@pytest.fixture
+def pool_of_two(monkeypatch):
+    monkeypatch.setattr(settings, "portfolio_workers", 2)
+    yield
+    portfolio.shutdown_pool()
+
+
+def _orgs(db):
+    ingest_rows(db, [
+        activity(org_id=org_id, quantity=100 * org_id) for org_id in (1, 2, 3)
+    ] + [activity(org_id=2, scope="1", category="diesel", unit="L", quantity=5)])
+
+
+def test_pool_is_shared_across_runs(db, factors, pool_of_two):
+    _orgs(db)
+    inline = portfolio.run_portfolio([1, 2, 3], *PERIOD, workers=1)
+    first = portfolio.run_portfolio([1, 2, 3], *PERIOD)
+    pool = portfolio._pool
+    second = portfolio.run_portfolio([3, 2, 1, 2], *PERIOD)
+    assert portfolio._pool is pool
+    assert first == inline
+    assert second["total_kg"] == pytest.approx(inline["total_kg"])
+    assert [o["org_id"] for o in second["orgs"]] == [3, 2, 1]
+
+
+def test_factor_change_replaces_the_pool(db, factors, pool_of_two):
+    _orgs(db)
+    # python engine: factors come from the workers' snapshot, not stored co2e_kg
+    before = portfolio.run_portfolio([1, 2], *PERIOD, engine="python")
+    pool = portfolio._pool
+    import_factor_rows(db, [{"dataset": "EPA", "region": "US", "category": "electricity", "input_unit": "kWh",
+                             "factor_value": 1.0, "year": 2022, "version": "EPA-2022"}])
+    after = portfolio.run_portfolio([1, 2], *PERIOD, engine="python")
+    assert portfolio._pool is not pool
+    assert before["by_category"]["electricity"] == pytest.approx(300 * 0.386)
+    assert after["by_category"]["electricity"] == pytest.approx(300 * 1.0)
+
+
+def test_shutdown_pool_is_idempotent(pool_of_two):
+    portfolio.shutdown_pool()
+    portfolio.shutdown_pool()
+    assert portfolio._pool is None
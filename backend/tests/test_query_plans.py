@@ -0,0 +1,48 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert, text
+
+from app.db import get_engine
+from app.models import Activity
+from app.scripts.check_query_plans import explain, problems
+
+pytestmark = pytest.mark.skipif(
+    get_engine().dialect.name != "postgresql", reason="plans are checked on Postgres (set TEST_DATABASE_URL)"
+)
+
+# created by migration e7b3c5a90f12 (mirrored by the model Index definitions)
+MIGRATION_INDEXES = ("ix_activities_org_period_start", "ix_activities_org_period_end", "ix_emission_factors_lookup")
+
+
+@pytest.fixture
+def populated(db, factors):
+    rnd = random.Random(0)
+    keys = [("electricity", "kWh"), ("diesel", "L"), ("gasoline", "L"), ("natural_gas", "therm")]
+    rows = []
+    for i in range(50_000):
+        category, unit = rnd.choice(keys)
+        start = date(2022, 1, 1) + timedelta(days=rnd.randrange(1000))
+        rows.append({
+            "org_id": rnd.randrange(1, 200), "scope": rnd.choice("123"), "category": category, "unit": unit,
+            "quantity": rnd.uniform(1, 1000), "period_start": start, "period_end": start + timedelta(days=30),
+        })
+    db.execute(insert(Activity), rows)
+    db.commit()
+    with get_engine().connect() as conn:
+        conn.execute(text("ANALYZE activities, emission_factors"))
+        conn.commit()
+
+
+def test_hot_queries_use_access_path_indexes(populated):
+    plans = explain(get_engine())
+    assert {name: problems(plan) for name, plan in plans.items()} == {name: [] for name in plans}
+
+
+def test_check_fails_without_the_migration(populated):
+    with get_engine().begin() as conn:
+        for name in MIGRATION_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+    plans = explain(get_engine())
+    assert [name for name, plan in plans.items() if not problems(plan)] == []
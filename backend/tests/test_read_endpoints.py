@@ -0,0 +1,105 @@
+import base64
+import threading
+from datetime import date
+
+import pytest
+
+from app.api import routes
+from app.services.ingest import ingest_rows
+from app.utils.pagination import encode_cursor
+from tests.conftest import activity
+
+PERIOD = {"org_id": 1, "period_start": "2024-01-01", "period_end": "2024-12-31"}
+
+
+@pytest.fixture
+def data(db, factors):
+    ingest_rows(db, [activity(quantity=100), activity(scope="3", category="diesel", unit="L", quantity=10)])
+
+
+def test_calculation_runs_off_the_event_loop(client, data, monkeypatch):
+    loop_threads = set()
+    calc_threads = []
+
+    async def note_loop_thread():
+        loop_threads.add(threading.get_ident())
+
+    original = routes.run_calculation_json
+
+    def spy(*args, **kwargs):
+        calc_threads.append(threading.get_ident())
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(routes, "run_calculation_json", spy)
+    client.portal.call(note_loop_thread)
+    r = client.get("/calculate/run", params=PERIOD)
+    assert r.status_code == 200
+    assert r.json()["total_kg"] == pytest.approx(100 * 0.386 + 10 * 2.68)
+    assert calc_threads and not loop_threads.intersection(calc_threads)
+
+
+def test_read_endpoints(client, data):
+    summary = client.get("/emissions/summary", params={**PERIOD, "mode": "sql"}).json()
+    assert summary == pytest.approx({"1": 100 * 0.386 + 0.0, "2": 0.0, "3": 10 * 2.68})
+    series = client.get("/emissions/timeseries", params={**PERIOD, "bucket": "month"}).json()
+    assert sum(v for p in series["series"] for v in p["values"].values()) == pytest.approx(100 * 0.386 + 26.8)
+    factors = client.get("/factors", params={"category": "electricity"}).json()
+    assert sorted((f["region"], f["factor_value"]) for f in factors) == [("CA", 0.1), ("US", 0.386), ("US", 0.4)]
+    scenarios = client.post("/calculate/scenarios", json={
+        **PERIOD, "scenarios": [{"name": "base"}, {"name": "ca", "region": "CA"}],
+    }).json()
+    assert [s["total_kg"] for s in scenarios["scenarios"]] == pytest.approx([100 * 0.386 + 26.8, 100 * 0.1])
+
+
+def test_cursor_paging_walks_every_activity_once(client, db):
+    # many rows share a period_start, so pages must break ties on id
+    starts = ["2024-01-01", "2024-02-01", "2024-02-01", "2024-03-01"]
+    ingest_rows(db, [activity(period_start=starts[n % 4], period_end="2024-03-31", quantity=n) for n in range(23)]
+                + [activity(org_id=2)])
+    expected = client.get("/activities", params={"org_id": 1, "limit": 1000}).json()
+    assert len(expected) == 23
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"org_id": 1, "limit": 5, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/activities", params=params)
+        assert r.status_code == 200
+        seen += r.json()
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert pages == 5
+    assert [a["id"] for a in seen] == [a["id"] for a in expected]
+    assert len({a["id"] for a in seen}) == 23
+    assert [(a["period_start"], a["id"]) for a in seen] == sorted(
+        ((a["period_start"], a["id"]) for a in seen), reverse=True
+    )
+
+
+def test_exact_last_page_ends_with_an_empty_page(client, db):
+    ingest_rows(db, [activity(quantity=n) for n in range(4)])
+    first = client.get("/activities", params={"limit": 4})
+    assert len(first.json()) == 4
+    last = client.get("/activities", params={"limit": 4, "cursor": first.headers["X-Next-Cursor"]})
+    assert last.json() == [] and "X-Next-Cursor" not in last.headers
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!", _b64(b"not json"), _b64(b'["2024-01-01"]'), _b64(b"[null, 1]"),
+    _b64(b'["2024-13-01", 1]'), _b64(b'["2024-01-01", "x"]'), _b64(b"5"),
+])
+def test_malformed_cursor_is_400(client, cursor):
+    r = client.get("/activities", params={"cursor": cursor})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
+
+
+def test_cursor_and_offset_together_is_400(client):
+    r = client.get("/activities", params={"cursor": encode_cursor(date(2024, 1, 1), 1), "offset": 5})
+    assert r.status_code == 400
+    assert "cursor or offset" in r.json()["detail"]
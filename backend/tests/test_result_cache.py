@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import update
+
+from app.models import EmissionFactor
+from app.services.factors import FactorIndex, FactorRecord
+from app.services.ingest import ingest_rows
+from app.services.result_cache import ResultCache, SingleFlight
+from app.services.versions import bump_factors
+from tests.conftest import activity
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = ResultCache(max_entries=100, ttl=60, max_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    assert cache.get("a") is not None  # b is now least recently used
+    cache.put("c", b"x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 20
+
+
+def test_oversized_bodies_are_not_cached():
+    cache = ResultCache(max_entries=100, ttl=60, max_bytes=1000, max_entry_bytes=50)
+    cache.put("small", b"x" * 50)
+    cache.put("big", b"x" * 51)
+    assert cache.get("big") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["skipped"]) == (1, 50, 1)
+
+
+def test_byte_total_follows_replace_expiry_and_clear():
+    cache = ResultCache(max_entries=2, ttl=0.05, max_bytes=1000)
+    cache.put("a", b"x" * 10)
+    cache.put("a", b"x" * 30)
+    assert cache.stats()["bytes"] == 30
+    cache.put("b", b"x" * 5)
+    cache.put("c", b"x" * 7)  # entry limit still applies
+    assert cache.stats()["bytes"] == 12
+    time.sleep(0.06)
+    assert cache.get("b") is None
+    assert cache.stats()["bytes"] == 7
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+def _change_factor_elsewhere(db, region, value):
+    # as another process would: no commit hook clears this process's index
+    db.execute(update(EmissionFactor).where(EmissionFactor.region == region).values(factor_value=value))
+    bump_factors(db)
+    db.commit()
+
+
+@pytest.mark.parametrize("path,params,total", [
+    ("/calculate/run", {"engine": "python"}, lambda r: r["total_kg"]),
+    ("/calculate/run", {"region": "CA"}, lambda r: r["total_kg"]),
+    ("/emissions/summary", {"mode": "python", "region": "CA"}, lambda r: sum(r.values())),
+])
+def test_versioned_results_follow_factor_changes_from_other_processes(client, db, factors, path, params, total):
+    ingest_rows(db, [activity(quantity=100)])
+    params = {"org_id": 1, "period_start": "2024-01-01", "period_end": "2024-12-31", **params}
+    first = client.get(path, params=params)
+    region = params.get("region", "US")
+    old = 0.386 if region == "US" else 0.1
+    assert total(first.json()) == pytest.approx(100 * old)
+
+    _change_factor_elsewhere(db, region, 2 * old)
+    second = client.get(path, params=params, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert total(second.json()) == pytest.approx(200 * old)
+    third = client.get(path, params=params, headers={"If-None-Match": second.headers["ETag"]})
+    assert third.status_code == 304
+
+
+def test_factor_index_never_goes_back_to_an_older_version():
+    index = FactorIndex()
+    newer = FactorRecord(1, "EPA", "US", "electricity", "kWh", 2.0, 2022, None)
+    older = FactorRecord(1, "EPA", "US", "electricity", "kWh", 1.0, 2022, None)
+    index.load_records([newer], version="5")
+    index.load_records([older], version="4")  # a slower concurrent load finishing last
+    assert index.version == "5"
+    assert index.records() == [newer]
+    index.invalidate()  # e.g. the tables were recreated: any version goes
+    index.load_records([older], version="1")
+    assert index.records() == [older]
+
+
+def _coalesced(endpoint):
+    return REGISTRY.get_sample_value("calc_coalesced_total", {"endpoint": endpoint}) or 0
+
+
+def test_single_flight_shares_one_computation():
+    flight, calls, n = SingleFlight(), [], 8
+    before = _coalesced("/test/shared")
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"body"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", compute, endpoint="/test/shared") for _ in range(n)))
+
+    assert asyncio.run(main()) == [b"body"] * n
+    assert len(calls) == 1
+    assert flight.stats() == {"inflight": 0, "coalesced": n - 1}
+    assert _coalesced("/test/shared") - before == n - 1
+
+
+def test_single_flight_waiter_takes_over_from_a_cancelled_leader():
+    flight, calls = SingleFlight(), []
+    before = _coalesced("/test/cancel")
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"body"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", compute, endpoint="/test/cancel"))
+        await asyncio.sleep(0.01)  # leader is computing
+        waiters = [asyncio.create_task(flight.do("k", compute, endpoint="/test/cancel")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(main()) == [b"body"] * 3
+    # one waiter recomputed, the other two shared its result
+    assert len(calls) == 2
+    assert flight.stats() == {"inflight": 0, "coalesced": 2}
+    assert _coalesced("/test/cancel") - before == 2
+
+
+def test_single_flight_shares_the_exception():
+    flight, calls = SingleFlight(), []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(e, ValueError) for e in results)
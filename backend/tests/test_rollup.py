@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Activity, EmissionRollup
+from app.services import rollup
+from app.services.calc import summarize_emissions
+from app.services.ingest import ingest_rows
+from tests.conftest import activity
+
+RANGES = [
+    (date(2024, 1, 1), date(2024, 12, 31)),   # whole months only
+    (date(2024, 1, 15), date(2024, 3, 10)),   # partial months at both edges
+    (date(2024, 2, 1), date(2024, 2, 29)),    # exactly one month
+    (date(2024, 2, 10), date(2024, 2, 12)),   # inside one month
+    (date(2023, 12, 20), date(2024, 2, 5)),   # across a year end
+]
+
+
+def _rows():
+    rows = []
+    for n, (start, end) in enumerate([
+        ("2023-12-28", "2024-01-03"), ("2024-01-10", "2024-01-20"), ("2024-01-31", "2024-02-01"),
+        ("2024-02-11", "2024-02-11"), ("2024-02-20", "2024-03-15"), ("2024-03-01", "2024-03-31"),
+        ("2024-06-01", "2024-06-30"), ("2024-12-15", "2025-01-15"),
+    ]):
+        for org_id in (1, 2):
+            rows.append(activity(org_id=org_id, scope="2", quantity=100 + n, period_start=start, period_end=end))
+            rows.append(activity(org_id=org_id, scope="1", category="diesel", unit="L", quantity=10 + n,
+                                 period_start=start, period_end=end))
+            rows.append(activity(org_id=org_id, scope="3", category="gasoline", unit="gal", quantity=n + 1,
+                                 period_start=start, period_end=end))
+            rows.append(activity(org_id=org_id, scope="3", category="natural_gas", unit="therm", quantity=5,
+                                 period_start=start, period_end=end))  # no US factor
+    return rows
+
+
+def _assert_matches_full_recompute(db):
+    for org_id in (1, 2):
+        for start, end in RANGES:
+            for group_by in ("scope", "category"):
+                for region in ("US", "CA"):
+                    expected = summarize_emissions(db, org_id, start, end, group_by=group_by, region=region)
+                    got = rollup.summarize_from_rollup(db, org_id, start, end, group_by=group_by, region=region)
+                    assert got == pytest.approx(expected), (org_id, start, end, group_by, region)
+
+
+def test_incremental_rollup_matches_full_recompute(db, factors):
+    rows = _rows()
+    # several inserts into the same rollup keys
+    ingest_rows(db, rows[: len(rows) // 2])
+    ingest_rows(db, rows[len(rows) // 2:], batch_size=7)
+    assert rollup.check(db) == []
+    _assert_matches_full_recompute(db)
+
+
+def test_rebuild_matches_full_recompute(db, factors):
+    ingest_rows(db, _rows())
+    stored = sorted((r.org_id, r.month, r.scope, r.category, r.unit, r.quantity, r.activity_count)
+                    for r in db.scalars(select(EmissionRollup)))
+    rollup.rebuild(db)
+    rebuilt = sorted((r.org_id, r.month, r.scope, r.category, r.unit, r.quantity, r.activity_count)
+                     for r in db.scalars(select(EmissionRollup)))
+    assert [r[:5] + (pytest.approx(r[5]), r[6]) for r in rebuilt] == stored
+    assert rollup.check(db) == []
+    _assert_matches_full_recompute(db)
+
+    rollup.rebuild(db, org_id=2)
+    assert rollup.check(db) == []
+    _assert_matches_full_recompute(db)
+
+
+def test_activities_without_org_stay_out_of_the_rollup(db, factors):
+    ingest_rows(db, _rows()[:4])
+    db.add(Activity(org_id=None, scope="1", category="electricity", unit="kWh", quantity=1.0,
+                    period_start=date(2024, 1, 1), period_end=date(2024, 1, 2)))
+    db.commit()
+    assert rollup.check(db) == []
+    rollup.rebuild(db)
+    assert db.scalar(select(EmissionRollup).where(EmissionRollup.org_id.is_(None))) is None
+    assert rollup.check(db) == []
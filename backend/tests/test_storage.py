@@ -0,0 +1,32 @@
+import io
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.models import Source
+from app.storage import LocalStorage
+
+
+def test_local_storage_stays_inside_its_root(tmp_path):
+    storage = LocalStorage(str(tmp_path / "root"))
+    uri = storage.save("sources/1/a.csv", io.BytesIO(b"x"))
+    assert storage.open(uri).read() == b"x"
+    with pytest.raises(ValueError):
+        storage.save("../escaped.csv", io.BytesIO(b"x"))
+    with pytest.raises(ValueError):
+        storage.open("file://" + str(tmp_path / "other.csv"))
+    assert not (tmp_path / "escaped.csv").exists()
+
+
+@pytest.mark.parametrize("filename", ["../../../../../escaped.csv", "..\\..\\escaped.csv", "/tmp/escaped.csv"])
+def test_upload_filename_cannot_leave_the_storage_dir(client, db, filename):
+    r = client.post("/sources/upload", data={"org_id": "1"},
+                    files={"file": (filename, b"org_id,scope\n", "text/csv")})
+    assert r.status_code == 200
+    src = db.get(Source, r.json()["id"])
+    assert src.filename == filename
+    path = src.storage_uri.removeprefix("file://")
+    root = os.path.realpath(settings.local_storage_dir)
+    assert os.path.dirname(path) == os.path.join(root, "sources", "1")
+    assert path.endswith("-escaped.csv") and os.path.exists(path)
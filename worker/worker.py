@@ -1,14 +1,65 @@
-import os
+import logging
+import multiprocessing
 import time
+
 import redis
 
+from app.core.config import settings
+from app.db import SessionLocal
+from app.services.ingest import INGEST_QUEUE, process_source
+from app.services.jobs import CALC_QUEUE, CalcJobs
 
-r = redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"))
 
+log = logging.getLogger("worker")
 
-if __name__ == "__main__":
-    print("Worker started. (stub)")
+
+def handle_ingest(source_id: int) -> None:
+    db = SessionLocal()
+    try:
+        src = process_source(db, source_id)
+        if src is None:
+            log.info("source %s already claimed, skipping", source_id)
+        else:
+            log.info("source %s %s: %s inserted, %s failed", source_id, src.status, src.rows_inserted, src.rows_failed)
+    except Exception:
+        # status/error are recorded on the Source row
+        log.exception("source %s failed", source_id)
+    finally:
+        db.close()
+
+
+def handle_calc(r: redis.Redis, job_id: str) -> None:
+    db = SessionLocal()
+    try:
+        CalcJobs(r).run(db, job_id)
+        log.info("calc job %s done", job_id)
+    except Exception:
+        # status/error are recorded on the job hash
+        log.exception("calc job %s failed", job_id)
+    finally:
+        db.close()
+
+
+def work(n: int) -> None:
+    logging.basicConfig(level=logging.INFO)
+    r = redis.from_url(settings.redis_url)
+    log.info("worker %s started", n)
     while True:
-        # Placeholder: poll a queue or just heartbeat
-        r.set("worker:heartbeat", int(time.time()))
-        time.sleep(5)
\ No newline at end of file
+        r.set(f"worker:{n}:heartbeat", int(time.time()))
+        item = r.blpop([INGEST_QUEUE, CALC_QUEUE], timeout=5)
+        if not item:
+            continue
+        queue, value = item[0].decode(), item[1].decode()
+        if queue == INGEST_QUEUE:
+            handle_ingest(int(value))
+        else:
+            handle_calc(r, value)
+
+
+if __name__ == "__main__":
+    print(f"Worker started with {settings.worker_concurrency} processes.")
+    procs = [multiprocessing.Process(target=work, args=(n,), daemon=True) for n in range(settings.worker_concurrency)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()